@@ -0,0 +1,284 @@
+import argparse
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from indicators import calculate_macd, calculate_rsi
+from market_config import find_timeframe, timeframe_code
+from resample import resample_close
+from scanner import batch_field, bottom_align
+from scoring import RULES, score
+
+# AI Analist puanlarının geçmiş performansı. Puanlar tüm barlar ve tüm semboller için
+# tek seferde (zaman x sembol) hesaplanır, eşiklerle pozisyona çevrilir:
+#   puan >= entry -> al (1), puan <= exit -> düz (0) ya da short=True ise açığa sat (-1),
+#   arada kalan barlarda önceki pozisyon korunur.
+# Bar t'nin kapanışında verilen karar t -> t+1 getirisine uygulanır (ileriye bakış yok).
+DEFAULT_COST_BPS = 10  # tek yön işlem maliyeti (baz puan: komisyon + kayma)
+DEFAULT_ENTRY = 1
+DEFAULT_EXIT = -1
+
+# Yıllıklandırma için yılda bar sayısı (gün içi dilimler BIST seansına göre yaklaşık)
+PERIODS_PER_YEAR = {
+    "1mo": 12, "1wk": 52, "1d": 252,
+    "4h": 252 * 2, "2h": 252 * 4, "60m": 252 * 8, "1h": 252 * 8,
+    "30min": 252 * 16, "15m": 252 * 32, "5m": 252 * 96,
+}
+
+BACKTEST_COLUMNS = ["Symbol", "Getiri %", "Al-Tut %", "Maks. Düşüş %", "İşlem", "İsabet %", "Devir (yıllık)", "Sharpe"]
+
+DEFAULT_GRID = {
+    "rsi_window": [9, 14, 21],
+    "sma_short": [10, 20, 30],
+    "sma_long": [50, 100],
+    "entry": [1, 2, 3],
+    "exit": [-1, -2],
+}
+# Bu parametreler indikatörleri değiştirir; diğerleri (eşikler) aynı puanları kullanır
+INDICATOR_PARAMS = ("rsi_window", "sma_short", "sma_long")
+SIGNAL_KEYS = ('RSI', 'MACD', 'Signal', 'SMA20', 'SMA50')
+
+
+def signal_values(close, rsi_window=14, sma_short=20, sma_long=50):
+    # close: (zaman x sembol) kapanışlar. Kurallar kısa/uzun ortalamayı SMA20/SMA50 adıyla okur.
+    close = pd.DataFrame(close)
+    fields = {'Close': close}
+    macd, signal_line = calculate_macd(fields)
+    return {
+        'Close': close.to_numpy(dtype=float),
+        'RSI': calculate_rsi(fields, rsi_window).to_numpy(dtype=float),
+        'MACD': macd.to_numpy(dtype=float),
+        'Signal': signal_line.to_numpy(dtype=float),
+        'SMA20': close.rolling(window=sma_short).mean().to_numpy(dtype=float),
+        'SMA50': close.rolling(window=sma_long).mean().to_numpy(dtype=float),
+    }
+
+
+def frame_values(df):
+    # IndicatorEngine çıktısındaki kolonlardan (zaman x 1) diziler
+    return {name: df[name].to_numpy(dtype=float)[:, None] for name in ('Close',) + SIGNAL_KEYS}
+
+
+def bar_scores(mode, values):
+    # Isınma barlarında (indikatörlerden biri NaN) puan NaN: pozisyon açılmaz
+    scores = np.asarray(score(mode, values), dtype=float)
+    warming = np.zeros(scores.shape, dtype=bool)
+    for name in ('Close',) + SIGNAL_KEYS:
+        warming |= np.isnan(values[name])
+    scores[warming] = np.nan
+    return scores
+
+
+def _ffill(values, fill=0.0):
+    # NaN'ları zaman ekseninde bir önceki geçerli değerle doldurur
+    rows = np.arange(len(values))[:, None]
+    idx = np.where(np.isnan(values), 0, rows)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    out = np.take_along_axis(values, idx, axis=0)
+    return np.where(np.isnan(out), fill, out)
+
+
+def positions(scores, entry=DEFAULT_ENTRY, exit=DEFAULT_EXIT, short=False):
+    target = np.full(scores.shape, np.nan)
+    target[scores <= exit] = -1 if short else 0
+    target[scores >= entry] = 1
+    return _ffill(target)
+
+
+def simulate_positions(close, pos, cost_bps=DEFAULT_COST_BPS, periods_per_year=252):
+    # close, pos: (zaman x sembol). Sembol başına istatistik tablosu ve özkaynak eğrileri.
+    close = np.asarray(close, dtype=float)
+    n, m = close.shape
+    cost = cost_bps / 10000
+    ret = np.zeros_like(close)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ret[1:] = close[1:] / close[:-1] - 1
+    ret = np.nan_to_num(ret, nan=0.0, posinf=0.0, neginf=0.0)
+
+    prev = np.zeros_like(pos)
+    prev[1:] = pos[:-1]
+    trades = np.abs(pos - prev)
+    strategy = prev * ret - cost * trades
+    equity = np.cumprod(1 + strategy, axis=0)
+    drawdown = equity / np.maximum.accumulate(equity, axis=0) - 1
+
+    valid = ~np.isnan(close)
+    first = np.argmax(valid, axis=0)
+    last = n - 1 - np.argmax(valid[::-1], axis=0)
+    cols = np.arange(m)
+    bars = np.maximum(valid.sum(axis=0), 1)
+    volatility = strategy.std(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        buy_hold = close[last, cols] / close[first, cols] - 1
+        # Hiç işlem yapmayan sembolün getirisi sabit 0: Sharpe NaN değil 0 (medyanlardan düşmesin)
+        sharpe = np.where(volatility > 0, strategy.mean(axis=0) / volatility * np.sqrt(periods_per_year), 0.0)
+
+    # İşlem bazında isabet: aynı pozisyonun tutulduğu ardışık barlar bir işlemdir.
+    # Bar t'nin getirisi, t-1'de açık olan pozisyonun işlemine yazılır.
+    segment = np.cumsum(pos != prev, axis=0)
+    held_segment = np.zeros_like(segment)
+    held_segment[1:] = segment[:-1]
+    held = prev != 0
+    ids = (held_segment + cols * (n + 1))[held]
+    trade_log = np.bincount(ids, weights=np.log1p(prev * ret)[held], minlength=m * (n + 1))
+    active = np.bincount(ids, minlength=m * (n + 1)) > 0
+    net = trade_log + 2 * np.log1p(-cost)
+    trade_count = np.bincount(np.flatnonzero(active) // (n + 1), minlength=m)
+    wins = np.bincount(np.flatnonzero(active & (net > 0)) // (n + 1), minlength=m)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        hit_rate = np.where(trade_count > 0, wins / trade_count, np.nan)
+
+    stats = pd.DataFrame({
+        "Getiri %": (equity[-1] - 1) * 100,
+        "Al-Tut %": buy_hold * 100,
+        "Maks. Düşüş %": drawdown.min(axis=0) * 100,
+        "İşlem": trade_count,
+        "İsabet %": hit_rate * 100,
+        "Devir (yıllık)": trades.sum(axis=0) * periods_per_year / bars,
+        "Sharpe": sharpe,
+    })
+    return stats, equity
+
+
+def backtest_frame(df, mode, entry=DEFAULT_ENTRY, exit=DEFAULT_EXIT, short=False,
+                   cost_bps=DEFAULT_COST_BPS, periods_per_year=252):
+    # Tek sembol, indikatör kolonları hazır çerçeve (IndicatorEngine çıktısı)
+    values = frame_values(df)
+    pos = positions(bar_scores(mode, values), entry, exit, short)
+    stats, equity = simulate_positions(values['Close'], pos, cost_bps, periods_per_year)
+    close = df['Close'].astype(float)
+    curves = pd.DataFrame({
+        "Strateji": equity[:, 0],
+        "Al-Tut": close / close.iloc[0],
+        "Pozisyon": pos[:, 0],
+    }, index=df.index)
+    return stats.iloc[0].to_dict(), curves
+
+
+def backtest_universe(close, symbols, mode, entry=DEFAULT_ENTRY, exit=DEFAULT_EXIT, short=False,
+                      cost_bps=DEFAULT_COST_BPS, periods_per_year=252, **indicator_params):
+    # close: alta yaslanmış (zaman x sembol) kapanış matrisi
+    values = signal_values(close, **indicator_params)
+    pos = positions(bar_scores(mode, values), entry, exit, short)
+    stats, _ = simulate_positions(values['Close'], pos, cost_bps, periods_per_year)
+    stats.insert(0, "Symbol", list(symbols))
+    return stats[BACKTEST_COLUMNS]
+
+
+def _summarize(stats):
+    # Parametre setinin evren genelindeki özeti; isabet yalnız işlem yapan semboller üzerinden
+    traded = stats["İşlem"] > 0
+    return {
+        "Medyan Getiri %": stats["Getiri %"].median(),
+        "Al-Tut Üstü %": (stats["Getiri %"] > stats["Al-Tut %"]).mean() * 100,
+        "İşlem Yapan": int(traded.sum()),
+        "Ort. İsabet %": stats.loc[traded, "İsabet %"].mean(),
+        "Medyan Düşüş %": stats["Maks. Düşüş %"].median(),
+        "Ort. Devir": stats["Devir (yıllık)"].mean(),
+        "Medyan Sharpe": stats["Sharpe"].median(),
+    }
+
+
+def _grid_task(close, mode, indicator_params, thresholds, short, cost_bps, periods_per_year):
+    # Bir indikatör ayarı: puanlar bir kez hesaplanır, tüm eşik kombinasyonları onlardan
+    values = signal_values(close, **indicator_params)
+    scores = bar_scores(mode, values)
+    rows = []
+    for entry, exit in thresholds:
+        pos = positions(scores, entry, exit, short)
+        stats, _ = simulate_positions(values['Close'], pos, cost_bps, periods_per_year)
+        rows.append({**indicator_params, "entry": entry, "exit": exit, **_summarize(stats)})
+    return rows
+
+
+# Süreç havuzunda kapanış matrisi her göreve değil, her işçiye bir kez gönderilir
+_GRID_CLOSE = None
+
+
+def _init_grid_worker(close):
+    global _GRID_CLOSE
+    _GRID_CLOSE = close
+
+
+def _pool_grid_task(*args):
+    return _grid_task(_GRID_CLOSE, *args)
+
+
+def run_grid(close, mode, grid=DEFAULT_GRID, short=False, cost_bps=DEFAULT_COST_BPS,
+             periods_per_year=252, workers=None):
+    indicator_names = [name for name in INDICATOR_PARAMS if name in grid]
+    indicator_sets = [dict(zip(indicator_names, combo))
+                      for combo in itertools.product(*(grid[name] for name in indicator_names))]
+    thresholds = [(entry, exit) for entry, exit in itertools.product(grid.get("entry", [DEFAULT_ENTRY]),
+                                                                     grid.get("exit", [DEFAULT_EXIT]))
+                  if exit < entry]
+    close = np.asarray(close, dtype=float)
+    task_args = [(mode, params, thresholds, short, cost_bps, periods_per_year) for params in indicator_sets]
+    if workers == 1 or len(indicator_sets) == 1:
+        parts = [_grid_task(close, *args) for args in task_args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_grid_worker, initargs=(close,)) as pool:
+            parts = list(pool.map(_pool_grid_task, *zip(*task_args)))
+    results = pd.DataFrame([row for part in parts for row in part])
+    return results.sort_values("Medyan Sharpe", ascending=False, ignore_index=True)
+
+
+def universe_close(df_batch, symbols, resample=None):
+    # Toplu indirmeden alta yaslanmış kapanış matrisi; verisi olmayan semboller atılır
+    close = batch_field(df_batch, 'Close', symbols)
+    if resample:
+        close = resample_close(close, resample)
+    close = bottom_align(close.to_numpy())
+    has_data = (~np.isnan(close)).sum(axis=0) > 1
+    return close[:, has_data], list(np.asarray(symbols, dtype=object)[has_data])
+
+
+def main(argv=None):
+    from providers import get_provider
+    from screener import fetch_universe
+    from universe import ASSET_CLASSES, get_universe
+
+    parser = argparse.ArgumentParser(description="AI Analist puanlarının geriye dönük testi ve parametre taraması")
+    parser.add_argument("--timeframe", default="1d")
+    parser.add_argument("--universe", default="equity", choices=["all"] + list(ASSET_CLASSES))
+    parser.add_argument("--mode", choices=list(RULES), help="Varsayılan: zaman diliminin modu")
+    parser.add_argument("--period", help="İndirilecek geçmiş (varsayılan: zaman diliminin en uzun periyodu)")
+    parser.add_argument("--cost-bps", type=float, default=DEFAULT_COST_BPS)
+    parser.add_argument("--short", action="store_true", help="SAT sinyalinde açığa satış")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--output", help="Tüm grid sonuçları için CSV dosyası")
+    args = parser.parse_args(argv)
+
+    _, params = find_timeframe(args.timeframe)
+    mode = args.mode or params["mode"]
+    code = timeframe_code(params)
+    period = args.period or params.get("fetch_period") or params["period"]
+    symbols = get_universe().select(asset_class=None if args.universe == "all" else args.universe)
+    provider = get_provider()
+
+    started = time.perf_counter()
+    df_batch, _ = fetch_universe(symbols, partial(provider.fetch_batch, interval=params["interval"]), period)
+    if df_batch is None:
+        print("Veri alınamadı.")
+        return 1
+    close, symbols = universe_close(df_batch, symbols, params.get("resample"))
+    print(f"{len(symbols)} sembol, {close.shape[0]} bar indirildi ({time.perf_counter() - started:.1f} sn)")
+
+    started = time.perf_counter()
+    results = run_grid(close, mode, short=args.short, cost_bps=args.cost_bps,
+                       periods_per_year=PERIODS_PER_YEAR.get(code, 252), workers=args.workers)
+    print(f"{len(results)} parametre seti x {len(symbols)} sembol ({time.perf_counter() - started:.1f} sn), mod {mode}")
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(results.head(args.top).round(2).to_string(index=False))
+    if args.output:
+        results.to_csv(args.output, index=False)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,258 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from backtest import backtest_universe, universe_close
+from data_store import enable_copy_on_write
+from downsample import DEFAULT_POINT_BUDGET, lttb_series, ohlc_buckets
+from indicators import IndicatorEngine, add_indicators, calculate_bollinger, calculate_cci, calculate_macd, calculate_rsi
+from monte_carlo import simulate
+from risk import RollingMoments, universe_returns
+from scanner import summarize_batch
+from screener import screen_frame
+
+# Yeniden çalıştırma gecikmesini belirleyen sıcak yolların ağ gerektirmeyen ölçümü:
+#   python benchmark.py --bars 1000 100000 1000000 --symbols 10 500 5000
+#   python benchmark.py --baseline benchmarks/<eski commit>.json --threshold 1.25
+# Her aşama için süre (ms), tepe bellek ve tutulan bellek blokları JSON'a yazılır.
+# Temel sonuca göre eşikten fazla yavaşlayan aşama varsa çıkış kodu 1 olur.
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks")
+
+DEFAULT_BARS = [1000, 100000]
+DEFAULT_SYMBOLS = [10, 500]
+# Evren taramalarında sembol başına bar sayısı (yfinance toplu indirmesine benzer)
+UNIVERSE_BARS = 120
+DEFAULT_THRESHOLD = 1.25
+# Bu süreden kısa ölçümler zamanlayıcı ve önbellek gürültüsüne çok açık (~5 ms'lik aşamalar
+# aynı commit'te x1.25'i aşabiliyor); gerilemede dikkate alınmaz
+MIN_COMPARABLE_MS = 10.0
+
+
+def synthetic_ohlcv(n, seed=0, freq="h"):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2020-01-01", periods=n, freq=freq, tz="UTC", name='Date')
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    open_ = np.concatenate([[100.0], close[:-1]])
+    wick = np.abs(rng.normal(0, 0.005, (2, n)))
+    return pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) * (1 + wick[0]),
+        'Low': np.minimum(open_, close) * (1 - wick[1]),
+        'Close': close,
+        'Volume': np.round(rng.lognormal(12, 1, n)),
+    }, index=index)
+
+
+def synthetic_universe(n_symbols, n_bars=UNIVERSE_BARS, seed=0):
+    # yfinance group_by='ticker' düzeninde geniş tablo. BIST sembollerinin bir kısmında
+    # tatil boşlukları ve eksik son bar olur (farklı takvimler).
+    rng = np.random.default_rng(seed)
+    suffixes = [".IS", "-USD", "=X"]
+    symbols = [f"SYM{i}{suffixes[i % 3]}" for i in range(n_symbols)]
+    index = pd.date_range("2024-01-01", periods=n_bars, freq="D", tz="UTC", name='Date')
+    frames = {}
+    for i, symbol in enumerate(symbols):
+        df = synthetic_ohlcv(n_bars, seed=seed + i, freq="D").set_axis(index)
+        if symbol.endswith(".IS"):
+            df.iloc[rng.choice(n_bars - 1, size=n_bars // 20, replace=False)] = np.nan
+            if i % 2:
+                df.iloc[-1] = np.nan
+        frames[symbol] = df
+    return pd.concat(frames, axis=1), symbols
+
+
+def _chart(df, budget=DEFAULT_POINT_BUDGET):
+    import plotly.graph_objects as go
+
+    candles = ohlc_buckets(df, budget)
+    fig = go.Figure()
+    fig.add_trace(go.Candlestick(x=candles.index, open=candles['Open'], high=candles['High'],
+                                 low=candles['Low'], close=candles['Close']))
+    for column in ('BB_Upper', 'BB_Middle', 'BB_Lower'):
+        points = lttb_series(df[column], budget)
+        fig.add_trace(go.Scatter(x=points.index, y=points))
+    fig.update_layout(template='plotly_dark', height=600)
+    # Streamlit figürü JSON olarak gönderir; serileştirme de maliyetin parçası
+    return fig.to_json()
+
+
+def _chart_stage(df):
+    data = add_indicators(df.copy())
+    return lambda: _chart(data)
+
+
+def _revised_last(frame, columns):
+    # Son satırı birbirinden farklı iki kopya; sırayla verilince her çağrı son barı revize eder
+    variants = []
+    for factor in (1.001, 0.999):
+        revised = frame.copy()
+        revised.iloc[-1, [frame.columns.get_loc(c) for c in columns]] *= factor
+        variants.append(revised)
+    return itertools.cycle(variants)
+
+
+def _engine_tail(df):
+    # Önceki barlar hazır; her çağrıda son bar (oluşmakta olan bar) yeni bir kapanışla gelir
+    engine = IndicatorEngine()
+    engine.update(df.iloc[:-1])
+    frames = _revised_last(df, ['Close'])
+    return lambda: engine.update(next(frames))
+
+
+def _risk_full(universe):
+    # Pencerenin baştan kurulması (ilk yükleme / sembol listesi değişimi)
+    returns = universe_returns(*universe)
+    return lambda: RollingMoments().update(returns).correlation()
+
+
+def _risk_tail(universe):
+    # Matris hazır; her çağrıda son bar revize edilir (artımlı güncelleme)
+    returns = universe_returns(*universe)
+    moments = RollingMoments()
+    moments.update(returns.iloc[:-1])
+    frames = _revised_last(returns, returns.columns)
+    return lambda: moments.update(next(frames)).correlation()
+
+
+# Aşama adı -> (boyut türü, hazırlık fonksiyonu). Hazırlık ölçülecek çağrıyı döndürür.
+STAGES = {
+    "rsi": ("bars", lambda df: lambda: calculate_rsi(df)),
+    "macd": ("bars", lambda df: lambda: calculate_macd(df)),
+    "bollinger": ("bars", lambda df: lambda: calculate_bollinger(df)),
+    "cci": ("bars", lambda df: lambda: calculate_cci(df)),
+    "indicators_full": ("bars", lambda df: lambda: add_indicators(df.copy())),
+    "indicators_tail": ("bars", _engine_tail),
+    "monte_carlo": ("bars", lambda df: lambda: simulate(
+        df['Close'].iloc[-1], df['Close'].pct_change().dropna().to_numpy(), n_paths=10000, seed=0)),
+    "chart_build": ("bars", _chart_stage),
+    "market_scan": ("symbols", lambda universe: lambda: summarize_batch(*universe)),
+    "signal_screen": ("symbols", lambda universe: lambda: screen_frame(*universe, "SWING", workers=1)),
+    "backtest": ("symbols", lambda universe: lambda: backtest_universe(*universe_close(*universe), "SWING")),
+    "risk_matrix": ("symbols", _risk_full),
+    "risk_matrix_tail": ("symbols", _risk_tail),
+}
+
+
+def measure(call, repeat):
+    call()  # ısınma: ilk çağrıdaki import ve önbellek maliyetleri ölçüme girmesin
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        times.append((time.perf_counter() - start) * 1000)
+
+    # Bellek ölçümü ayrı çalıştırmada; tracemalloc süreyi bozmasın
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    result = call()
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename') if stat.count_diff > 0)
+    del result
+    return {
+        "median_ms": statistics.median(times),
+        "min_ms": min(times),
+        "peak_kb": peak / 1024,
+        "blocks": blocks,
+    }
+
+
+def run(stages, bars_list, symbols_list, repeat, log=print):
+    results = []
+    for name in stages:
+        kind, prepare = STAGES[name]
+        sizes = bars_list if kind == "bars" else symbols_list
+        for size in sizes:
+            data = synthetic_ohlcv(size) if kind == "bars" else synthetic_universe(size)
+            stats = measure(prepare(data), repeat)
+            row = {"stage": name, kind: size, **stats}
+            results.append(row)
+            log(f"{name:<16} {kind}={size:<8} {stats['median_ms']:10.2f} ms  "
+                f"tepe {stats['peak_kb']:10.0f} KB  {stats['blocks']:8d} blok")
+    return results
+
+
+def _key(row):
+    return row["stage"], row.get("bars"), row.get("symbols")
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    # Eşikten fazla yavaşlayan aşamalar: (satır, temel süre, oran)
+    previous = {_key(row): row for row in baseline["results"]}
+    regressions = []
+    for row in results:
+        old = previous.get(_key(row))
+        if old is None or old["min_ms"] < MIN_COMPARABLE_MS:
+            continue
+        # En iyi tekrar karşılaştırılır; arka plan yükü medyandan çok daha az etkiler
+        ratio = row["min_ms"] / old["min_ms"]
+        if ratio > threshold:
+            regressions.append((row, old["min_ms"], ratio))
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Finans performans ölçümleri (ağ gerektirmez)")
+    parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=list(STAGES))
+    parser.add_argument("--bars", nargs="+", type=int, default=DEFAULT_BARS)
+    parser.add_argument("--symbols", nargs="+", type=int, default=DEFAULT_SYMBOLS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Sonuç JSON dosyası (varsayılan: benchmarks/<commit>.json)")
+    parser.add_argument("--baseline", help="Karşılaştırılacak önceki sonuç JSON dosyası")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="İzin verilen yavaşlama oranı (1.25 = %%25)")
+    args = parser.parse_args(argv)
+    # Uygulamayla aynı koşullarda ölçülür
+    enable_copy_on_write()
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "repeat": args.repeat,
+        "results": run(args.stages, args.bars, args.symbols, args.repeat),
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Sonuçlar: {output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report["results"], baseline, args.threshold)
+        for row, old_ms, ratio in regressions:
+            size = row.get("bars", row.get("symbols"))
+            print(f"GERİLEME {row['stage']} ({size}): {old_ms:.2f} -> {row['min_ms']:.2f} ms (x{ratio:.2f})")
+        if regressions:
+            return 1
+        print(f"Gerileme yok ({baseline.get('commit', '?')} ile karşılaştırıldı, eşik x{args.threshold})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
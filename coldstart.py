@@ -0,0 +1,148 @@
+import argparse
+import ast
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmark import DEFAULT_THRESHOLD, RESULTS_DIR, compare, git_commit
+
+# Soğuk başlangıç ölçümü: her ölçüm yeni bir Python sürecinde yapılır.
+#   python coldstart.py --repeat 3
+#   FINANS_PROVIDER=replay python coldstart.py --baseline benchmarks/coldstart-<eski commit>.json
+# - imports: ağır bağımlılıkların tek başına içe aktarma süresi (python -X importtime)
+# - app_imports: finance_app.py'nin modül başındaki içe aktarmalarının toplamı
+# - first_run: uygulamanın ilk çalıştırması (AppTest), ikinci çalıştırma ayrıca verilir
+# Bar deposu (FINANS_CACHE_DIR) doluysa ilk ekran diskten gelir; ağdan bağımsız ölçüm
+# için FINANS_PROVIDER=replay kullanılabilir.
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "finance_app.py")
+HEAVY_MODULES = ["streamlit", "pandas", "numpy", "pyarrow", "plotly.graph_objects", "yfinance", "streamlit_autorefresh"]
+
+_FIRST_RUN = """
+import json, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=600)
+loaded = time.perf_counter()
+at.run()
+first = time.perf_counter()
+at.run()
+second = time.perf_counter()
+print(json.dumps({"harness_ms": (loaded - started) * 1000, "first_run_ms": (first - loaded) * 1000,
+                  "rerun_ms": (second - first) * 1000, "exceptions": len(at.exception)}))
+"""
+
+
+def app_imports(path=APP_PATH):
+    # Uygulamanın modül başında (koşulsuz) içe aktardığı modüller
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def _python(args, env=None, cwd=None):
+    return subprocess.run([sys.executable] + args, capture_output=True, text=True, env=env, cwd=cwd)
+
+
+def import_time(module):
+    # -X importtime çıktısındaki modülün kümülatif süresi (ms); yüklü değilse None
+    result = _python(["-X", "importtime", "-c", f"import {module}"])
+    if result.returncode != 0:
+        return None
+    for line in reversed(result.stderr.splitlines()):
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1000
+    return None
+
+
+def imports_time(modules, cwd):
+    code = ("import time\nstarted = time.perf_counter()\n" + "".join(f"import {m}\n" for m in modules)
+            + "print((time.perf_counter() - started) * 1000)")
+    result = _python(["-c", code], cwd=cwd)
+    return float(result.stdout.strip()) if result.returncode == 0 else None
+
+
+def first_run(env):
+    started = time.perf_counter()
+    result = _python(["-c", _FIRST_RUN, APP_PATH], env=env, cwd=os.path.dirname(APP_PATH))
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+    row = json.loads(result.stdout.strip().splitlines()[-1])
+    row["process_ms"] = (time.perf_counter() - started) * 1000
+    return row
+
+
+def run(repeat, log=print):
+    results = []
+
+    def add(stage, values, **extra):
+        values = [v for v in values if v is not None]
+        if not values:
+            log(f"{stage:<28} ölçülemedi")
+            return
+        row = {"stage": stage, "median_ms": statistics.median(values), "min_ms": min(values), **extra}
+        results.append(row)
+        log(f"{stage:<28} {row['median_ms']:10.1f} ms  (en iyi {row['min_ms']:.1f})")
+
+    for module in HEAVY_MODULES:
+        add(f"import:{module}", [import_time(module) for _ in range(repeat)])
+    modules = app_imports()
+    add("app_imports", [imports_time(modules, os.path.dirname(APP_PATH)) for _ in range(repeat)], modules=modules)
+
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.path.dirname(APP_PATH), os.environ.get("PYTHONPATH")])))
+    runs = [first_run(env) for _ in range(repeat)]
+    for field in ("process_ms", "first_run_ms", "rerun_ms"):
+        add(field[:-3], [r[field] for r in runs])
+    if any(r["exceptions"] for r in runs):
+        log("UYARI: uygulama ilk çalıştırmada hata verdi")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Soğuk başlangıç ve içe aktarma süresi raporu")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Sonuç JSON dosyası (varsayılan: benchmarks/coldstart-<commit>.json)")
+    parser.add_argument("--baseline", help="Karşılaştırılacak önceki sonuç JSON dosyası")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="İzin verilen yavaşlama oranı (1.25 = %%25)")
+    args = parser.parse_args(argv)
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "provider": os.environ.get("FINANS_PROVIDER", "yfinance"),
+        "repeat": args.repeat,
+        "results": run(args.repeat),
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"coldstart-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Sonuçlar: {output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report["results"], baseline, args.threshold)
+        for row, old_ms, ratio in regressions:
+            print(f"GERİLEME {row['stage']}: {old_ms:.1f} -> {row['min_ms']:.1f} ms (x{ratio:.2f})")
+        if regressions:
+            return 1
+        print(f"Gerileme yok ({baseline.get('commit', '?')} ile karşılaştırıldı, eşik x{args.threshold})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,326 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# Kalıcı bar deposu: (ticker, interval) başına tüm indirilmiş geçmiş diskte tutulur.
+# Yenilemede sadece son kayıtlı bardan sonrası (+ açık barı düzeltmek için küçük bir
+# örtüşme) indirilir ve sona eklenir.
+CACHE_DIR = os.environ.get(
+    "FINANS_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".finans_cache"),
+)
+
+# yfinance periyot kodlarının yaklaşık karşılıkları
+PERIOD_OFFSETS = {
+    "1d": pd.DateOffset(days=1),
+    "5d": pd.DateOffset(days=5),
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+# Bir barın süresi (delta isteğinde örtüşme hesabı için)
+INTERVAL_STEPS = {
+    "1m": pd.Timedelta(minutes=1),
+    "2m": pd.Timedelta(minutes=2),
+    "5m": pd.Timedelta(minutes=5),
+    "15m": pd.Timedelta(minutes=15),
+    "30m": pd.Timedelta(minutes=30),
+    "60m": pd.Timedelta(hours=1),
+    "1h": pd.Timedelta(hours=1),
+    "1d": pd.Timedelta(days=1),
+    "5d": pd.Timedelta(days=5),
+    "1wk": pd.Timedelta(weeks=1),
+    "1mo": pd.Timedelta(days=31),
+    "3mo": pd.Timedelta(days=92),
+}
+
+# Açık (henüz kapanmamış) barı düzeltmek için tekrar istenen bar sayısı
+DELTA_OVERLAP_BARS = 2
+
+# Depodaki geçmiş (son DELTA_OVERLAP_BARS + 1 bardan önceki barlar) değiştiğinde artan
+# sayaç; döndürülen çerçevenin attrs'ında taşınır. Artımlı hesaplayanlar (IndicatorEngine)
+# sayaç değişince baştan hesaplar.
+REVISION_ATTR = "bars_revision"
+
+# Görünüm bu oranın üzerine büyürse başlangıç noktası ileri kaydırılır
+MAX_VIEW_GROWTH = 2
+
+# Kompakt bellek düzeni: fiyatlar float32, hacim int64 (FINANS_COMPACT_BARS=0 ile kapanır).
+# Okuyuculara kopya yerine depodaki çerçevenin görünümü verilir; Copy-on-Write
+# sayesinde okuyucunun yaptığı değişiklik depoya yansımaz (bkz. enable_copy_on_write).
+COMPACT_BARS = os.environ.get("FINANS_COMPACT_BARS", "1") != "0"
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Adj Close']
+PRICE_DTYPE = np.float32
+VOLUME_DTYPE = np.int64
+
+
+
+def enable_copy_on_write():
+    # pandas 2.x'te Copy-on-Write isteğe bağlı (3.x'te her zaman açık). Süreç geneli bir
+    # ayar olduğundan modül içe aktarılırken değil, giriş noktalarında (uygulama, worker) açılır.
+    if int(pd.__version__.split(".")[0]) < 3:
+        pd.set_option("mode.copy_on_write", True)
+
+
+def normalize_ohlcv(df):
+    if df is None or df.empty:
+        return None
+    df = df.copy()
+    # MultiIndex Düzeltmesi
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+    df = df[~df.index.duplicated(keep='last')].sort_index()
+    df.index.name = 'Date'
+    return df
+
+
+def _field(column):
+    # Düz kolon ya da yfinance toplu indirmesindeki (ticker, alan) / (alan, ticker) çifti
+    if isinstance(column, tuple):
+        return next((c for c in column if c in PRICE_COLUMNS or c == 'Volume'), None)
+    return column
+
+
+def compact_ohlcv(df):
+    # Fiyatlar float32, hacim int64 (eksik hacim 0); zaten kompaktsa aynen döner
+    if df is None or df.empty:
+        return df
+    dtypes = {}
+    for column in df.columns:
+        field = _field(column)
+        if field in PRICE_COLUMNS:
+            dtypes[column] = PRICE_DTYPE
+        elif field == 'Volume':
+            dtypes[column] = VOLUME_DTYPE
+    if all(df[column].dtype == dtype for column, dtype in dtypes.items()):
+        return df
+    volume = [column for column, dtype in dtypes.items() if dtype is VOLUME_DTYPE]
+    if volume:
+        df = df.copy(deep=False)
+        df[volume] = df[volume].fillna(0).round()
+    return df.astype(dtypes)
+
+
+def merge_bars(stored, fresh):
+    if stored is None or stored.empty:
+        return fresh
+    if fresh is None or fresh.empty:
+        return stored
+    merged = pd.concat([stored, fresh])
+    # Aynı zaman damgası için yeni gelen (revize edilmiş) bar geçerlidir
+    merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+    merged.index.name = 'Date'
+    return merged
+
+
+def revised_before_tail(stored, fresh, tail):
+    # fresh, depodaki son `tail` bardan önceki bir barı değiştiriyor mu
+    if stored is None or fresh is None or len(stored) <= tail:
+        return False
+    head = stored.iloc[:len(stored) - tail]
+    common = head.index.intersection(fresh.index)
+    if common.empty:
+        return False
+    columns = head.columns.intersection(fresh.columns)
+    old = head.loc[common, columns].to_numpy(dtype=float)
+    new = fresh.loc[common, columns].to_numpy(dtype=float)
+    return not np.array_equal(old, new, equal_nan=True)
+
+
+def _with_revision(view, meta):
+    view.attrs[REVISION_ATTR] = meta.get("revision", 0)
+    return view
+
+
+def safe_name(text):
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in text)
+
+
+def bar_paths(root, ticker, interval):
+    base = os.path.join(root, "bars", f"{safe_name(ticker)}__{safe_name(interval)}")
+    return base + ".parquet", base + ".json"
+
+
+def align_timestamp(ts, index):
+    # Zaman damgasını indeksin saat dilimine uydur
+    ts = pd.Timestamp(ts)
+    tz = getattr(index, "tz", None)
+    if ts.tz is None and tz is not None:
+        return ts.tz_localize(tz)
+    if ts.tz is not None and tz is None:
+        return ts.tz_convert(None)
+    return ts
+
+
+class BarStore:
+    def __init__(self, root=CACHE_DIR, compact=COMPACT_BARS):
+        self.root = root
+        self.compact = compact
+        self._frames = {}
+        self._meta = {}
+        self._mtimes = {}
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock_for(self, key):
+        with self._locks_guard:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    def _paths(self, ticker, interval):
+        return bar_paths(self.root, ticker, interval)
+
+    def _mtime(self, key):
+        try:
+            return os.path.getmtime(self._paths(*key)[1])
+        except OSError:
+            return None
+
+    def _read(self, key):
+        # Başka bir süreç (ör. worker.py) dosyayı güncellediyse diskten yeniden oku
+        mtime = self._mtime(key)
+        if key in self._frames and self._mtimes.get(key) == mtime:
+            return self._frames[key], self._meta[key]
+        data_path, meta_path = self._paths(*key)
+        df, meta = None, {"anchors": {}}
+        try:
+            if os.path.exists(data_path):
+                df = self._normalize(pd.read_parquet(data_path))
+            if os.path.exists(meta_path):
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+        except Exception:
+            # Bozuk dosya: geçmişi sıfırdan indir
+            df, meta = None, {"anchors": {}}
+        self._frames[key] = df
+        self._meta[key] = meta
+        self._mtimes[key] = mtime
+        return df, meta
+
+    def _write(self, key, df, meta, write_data=True):
+        self._frames[key] = df
+        self._meta[key] = meta
+        data_path, meta_path = self._paths(*key)
+        try:
+            os.makedirs(os.path.dirname(data_path), exist_ok=True)
+            # Yarım yazılmış dosya kalmasın diye önce geçici dosyaya yaz
+            if write_data:
+                df.to_parquet(data_path + ".tmp")
+                os.replace(data_path + ".tmp", data_path)
+            with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(meta_path + ".tmp", meta_path)
+        except Exception:
+            # Disk yazılamasa bile bellekteki kopya ile devam edilir
+            pass
+        self._mtimes[key] = self._mtime(key)
+
+    def _normalize(self, df):
+        df = normalize_ohlcv(df)
+        return compact_ohlcv(df) if self.compact else df
+
+    def load(self, ticker, interval):
+        with self._lock_for((ticker, interval)):
+            return self._read((ticker, interval))[0]
+
+    def _derive_anchor(self, df, meta, period):
+        # Daha uzun bir periyot zaten indirildiyse kısa periyot ondan kesilir
+        offset = PERIOD_OFFSETS.get(period)
+        if offset is None or df is None or df.empty:
+            return None
+        ref = df.index[-1]
+        cutoff = ref - offset
+        for other, anchor in meta["anchors"].items():
+            other_offset = PERIOD_OFFSETS.get(other)
+            if other_offset is None or ref - other_offset > cutoff:
+                continue
+            view = df[df.index >= cutoff]
+            if view.empty:
+                return None
+            return {"start": view.index[0].isoformat(), "bars": len(view)}
+        return None
+
+    def peek(self, ticker, period, interval):
+        # Ağa gitmeden diskteki son veri (soğuk başlangıçta ilk ekran için);
+        # bu periyot hiç indirilmediyse None
+        key = (ticker, interval)
+        with self._lock_for(key):
+            stored, meta = self._read(key)
+            if stored is None or stored.empty:
+                return None
+            anchors = {"anchors": dict(meta.get("anchors", {}))}
+            anchor = anchors["anchors"].get(period) or self._derive_anchor(stored, anchors, period)
+            if anchor is None:
+                return None
+            start = align_timestamp(anchor["start"], stored.index)
+            return _with_revision(stored.iloc[stored.index.searchsorted(start):], meta)
+
+    def get(self, ticker, period, interval, provider, fetch_period=None, max_age=0):
+        # fetch_period: ilk indirmede istenecek (daha uzun) periyot; aynı temel interval'i
+        # kullanan tüm zaman dilimleri tek indirmeden beslenir.
+        # max_age: son kontrol (bu süreç ya da worker.py tarafından) bu kadar saniyeden
+        # yeniyse delta isteği atlanır ve diskteki veri kullanılır.
+        key = (ticker, interval)
+        with self._lock_for(key):
+            stored, meta = self._read(key)
+            meta = {"anchors": dict(meta.get("anchors", {})), "checked_at": meta.get("checked_at", 0),
+                    "revision": meta.get("revision", 0)}
+            anchor = meta["anchors"].get(period) if stored is not None else None
+            if anchor is None:
+                anchor = self._derive_anchor(stored, meta, period)
+
+            changed = False
+            data_changed = False
+            if anchor is None:
+                # İlk yükleme: tüm periyodu indir
+                fetch_period = fetch_period or period
+                fresh = self._normalize(provider.fetch_history(ticker, fetch_period, interval))
+                if fresh is None:
+                    return None
+                merged = merge_bars(stored, fresh)
+                if revised_before_tail(stored, fresh, DELTA_OVERLAP_BARS + 1):
+                    meta["revision"] += 1
+                meta["anchors"][fetch_period] = {"start": fresh.index[0].isoformat(), "bars": len(fresh)}
+                anchor = meta["anchors"][fetch_period]
+                if fetch_period != period:
+                    anchor = self._derive_anchor(merged, meta, period) or anchor
+                meta["checked_at"] = time.time()
+                changed = data_changed = True
+            elif time.time() - meta["checked_at"] < max_age:
+                merged = stored
+            else:
+                # Delta: son kayıtlı bardan biraz öncesinden itibaren iste
+                step = INTERVAL_STEPS.get(interval, pd.Timedelta(days=1))
+                since = stored.index[-1] - step * DELTA_OVERLAP_BARS
+                fresh = self._normalize(provider.fetch_delta(ticker, since, interval))
+                merged = merge_bars(stored, fresh)
+                if revised_before_tail(stored, fresh, DELTA_OVERLAP_BARS + 1):
+                    meta["revision"] += 1
+                meta["checked_at"] = time.time()
+                changed = True
+                data_changed = fresh is not None
+
+            start = align_timestamp(anchor["start"], merged.index)
+            # Maske yerine konumsal dilim: kopya değil, depodaki çerçevenin görünümü
+            view = merged.iloc[merged.index.searchsorted(start):]
+            if len(view) > anchor["bars"] * MAX_VIEW_GROWTH:
+                view = view.iloc[-anchor["bars"]:]
+                anchor = {"start": view.index[0].isoformat(), "bars": anchor["bars"]}
+                changed = True
+
+            if meta["anchors"].get(period) != anchor:
+                meta["anchors"][period] = anchor
+                changed = True
+            if changed:
+                self._write(key, merged, meta, write_data=data_changed)
+            return _with_revision(view, meta)
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+# Grafiğe gönderilen nokta sayısını ekran genişliğine göre sınırlar.
+# Mumlar için OHLC korunarak kovalara toplanır, çizgiler için LTTB kullanılır.
+DEFAULT_POINT_BUDGET = 1500
+
+
+def ohlc_buckets(df, budget=DEFAULT_POINT_BUDGET):
+    # Ardışık barları kovalar: Open ilk, High en yüksek, Low en düşük, Close son, Volume toplam
+    n = len(df)
+    if n <= budget:
+        return df
+    size = int(np.ceil(n / budget))
+    starts = np.arange(0, n, size)
+    ends = np.minimum(starts + size, n) - 1
+    out = {
+        'Open': df['Open'].to_numpy(dtype=float)[starts],
+        'High': np.fmax.reduceat(df['High'].to_numpy(dtype=float), starts),
+        'Low': np.fmin.reduceat(df['Low'].to_numpy(dtype=float), starts),
+        'Close': df['Close'].to_numpy(dtype=float)[ends],
+    }
+    if 'Volume' in df:
+        out['Volume'] = np.add.reduceat(np.nan_to_num(df['Volume'].to_numpy(dtype=float)), starts)
+    return pd.DataFrame(out, index=df.index[starts])
+
+
+def lttb_indices(y, budget=DEFAULT_POINT_BUDGET):
+    # Largest-Triangle-Three-Buckets: görsel şekli koruyan nokta seçimi.
+    # x ekseni olarak bar sırası kullanılır (seans boşlukları şekli bozmasın diye).
+    y = np.asarray(y, dtype=float)
+    valid = np.flatnonzero(~np.isnan(y))
+    n = len(valid)
+    if n <= budget or budget < 3:
+        return valid
+    x = valid.astype(float)
+    v = y[valid]
+    edges = np.linspace(1, n - 1, budget - 1).astype(int)
+    # Her kovanın ortalaması (bir sonraki kovanın üçgendeki üçüncü köşesi); son nokta eklenir
+    counts = np.diff(np.append(edges, n))
+    mean_x = np.add.reduceat(x, edges) / counts
+    mean_y = np.add.reduceat(v, edges) / counts
+    selected = np.empty(budget, dtype=np.int64)
+    selected[0] = 0
+    a = 0
+    for i in range(budget - 2):
+        lo, hi = edges[i], edges[i + 1]
+        avg_x, avg_y = mean_x[i + 1], mean_y[i + 1]
+        xa, ya = x[a], v[a]
+        area = np.abs((xa - avg_x) * (v[lo:hi] - ya) - (xa - x[lo:hi]) * (avg_y - ya))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    selected[-1] = n - 1
+    return valid[selected]
+
+
+def lttb_series(series, budget=DEFAULT_POINT_BUDGET):
+    if len(series) <= budget:
+        return series
+    return series.iloc[lttb_indices(series.to_numpy(dtype=float), budget)]
@@ -0,0 +1,174 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pandas as pd
+
+# Süreç genelinde paylaşılan veri önbelleği:
+# - Aynı anahtar için eşzamanlı istekler tek bir indirmeyi paylaşır (single-flight)
+# - Bellek boyutuna göre sınırlı LRU
+# - Süresi geçmiş (ama stale_ttl içinde) kayıt hemen döner, arka planda tek bir yenileme çalışır
+# - Soğuk başlangıçta `initial` (ör. diskteki veri) varsa o döner, indirme arka planda sürer
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def estimate_size(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_size(v) for v in value)
+    if isinstance(value, dict):
+        return sum(estimate_size(v) for v in value.values())
+    return sys.getsizeof(value)
+
+
+class _Entry:
+    __slots__ = ("value", "time", "size")
+
+    def __init__(self, value, size, age=0):
+        self.value = value
+        self.time = time.monotonic() - age
+        self.size = size
+
+
+class FetchCoordinator:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, refresh_workers=4):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="fetch-refresh")
+        self.counters = {
+            "hit": 0,
+            "stale_hit": 0,
+            "miss": 0,
+            "inflight_join": 0,
+            "refresh": 0,
+            "eviction": 0,
+            "error": 0,
+            "warm_start": 0,
+        }
+        # Anahtarın ilk elemanına ("bars", "screen"...) göre arama sonuçları
+        self.kind_counters = {}
+
+    def get(self, key, loader, ttl, stale_ttl=0, initial=None):
+        # initial: ağ gerektirmeyen geçici değer üreten fonksiyon (yoksa None döner)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = time.monotonic() - entry.time
+                if age < ttl:
+                    self._count(key, "hit")
+                    self._entries.move_to_end(key)
+                    return entry.value
+                if age < ttl + stale_ttl:
+                    # Eski veriyi hemen dön, yenilemeyi arka plana bırak
+                    self._count(key, "stale_hit")
+                    self._entries.move_to_end(key)
+                    if key not in self._inflight:
+                        self.counters["refresh"] += 1
+                        flight = self._inflight[key] = Future()
+                        self._refresher.submit(self._run, key, loader, flight)
+                    return entry.value
+            flight = self._inflight.get(key)
+            if flight is not None:
+                self._count(key, "inflight_join")
+                leader = False
+            else:
+                self._count(key, "miss")
+                flight = self._inflight[key] = Future()
+                leader = True
+        if leader:
+            provisional = self._initial(initial)
+            if provisional is not None:
+                # Geçici değer hemen eskimiş olarak saklanır; yenileme bitene kadar
+                # gelen istekler de onu alır
+                with self._lock:
+                    self._store(key, provisional, age=ttl)
+                    self.counters["warm_start"] += 1
+                    self.counters["refresh"] += 1
+                self._refresher.submit(self._run, key, loader, flight)
+                return provisional
+            self._run(key, loader, flight)
+        return flight.result()
+
+    @staticmethod
+    def _initial(initial):
+        if initial is None:
+            return None
+        try:
+            return initial()
+        except Exception:
+            return None
+
+    def pending(self, key):
+        # Anahtar için süren bir indirme/yenileme var mı
+        with self._lock:
+            return key in self._inflight
+
+    def _count(self, key, outcome):
+        self.counters[outcome] += 1
+        kind = key[0] if isinstance(key, tuple) and key else key
+        counters = self.kind_counters.setdefault(kind, {})
+        counters[outcome] = counters.get(outcome, 0) + 1
+
+    def _run(self, key, loader, flight):
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock:
+                self.counters["error"] += 1
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+            flight.set_exception(e)
+            return
+        with self._lock:
+            # invalidate sonrası bırakılan indirme yeni kaydı ve yeni indirmeyi ezmez;
+            # sonucu yalnız ona katılmış isteklere gider
+            if self._inflight.get(key) is flight:
+                del self._inflight[key]
+                self._store(key, value)
+        flight.set_result(value)
+
+    def _store(self, key, value, age=0):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old.size
+        entry = _Entry(value, estimate_size(value), age)
+        self._entries[key] = entry
+        self._bytes += entry.size
+        # En az kullanılanlardan başlayarak bellek sınırına inene kadar çıkar
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.counters["eviction"] += 1
+
+    def invalidate(self, match):
+        # match: anahtar alıp True/False dönen fonksiyon. Süren indirmeler de bırakılır;
+        # sonraki istek eski ayarlarla başlamış bir indirmeye katılmaz, yenisini başlatır.
+        with self._lock:
+            keys = [key for key in self._entries if match(key)]
+            for key in keys:
+                self._bytes -= self._entries.pop(key).size
+            for key in [key for key in self._inflight if match(key)]:
+                del self._inflight[key]
+        return len(keys)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+            stats["inflight"] = len(self._inflight)
+        lookups = stats["hit"] + stats["stale_hit"] + stats["miss"] + stats["inflight_join"]
+        stats["hit_rate"] = (stats["hit"] + stats["stale_hit"]) / lookups if lookups else 0.0
+        return stats
+
+    def kind_stats(self):
+        with self._lock:
+            return {kind: dict(counters) for kind, counters in self.kind_counters.items()}
@@ -1,125 +1,72 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
-from streamlit_autorefresh import st_autorefresh
+import os
+import time
+import zlib
+from functools import partial
+
+from backtest import DEFAULT_COST_BPS, DEFAULT_ENTRY, DEFAULT_EXIT, PERIODS_PER_YEAR, backtest_frame
+from data_store import REVISION_ATTR, BarStore, enable_copy_on_write
+from downsample import DEFAULT_POINT_BUDGET, lttb_series, ohlc_buckets
+from fetch_cache import FetchCoordinator
+from indicators import IndicatorEngine
+from live_feed import LIVE_POLL_SECONDS, LiveFeed, align_index, bar_step, get_quote_source, merge_live
+from market_config import INTERVALS, WORKER_EVERY, timeframe_code
+from monte_carlo import simulate
+from perf import RerunProfiler, StageMetrics, hit_rate
+from providers import get_provider
+from risk import (BENCHMARKS, DEFAULT_WINDOW, VAR_LEVEL, RollingMoments, beta, portfolio_returns,
+                  simulate_portfolio, top_pairs, universe_returns, value_at_risk)
+from resample import resample_ohlcv
+from scanner import scan, summarize_reports, top_n
+from scoring import decision, evaluate
+from screener import fetch_universe, screen_universe
+from universe import ASSET_CLASSES, get_universe
+from worker import load_snapshot, read_alerts
+
+# Depo ve indikatör motoru oturumlara görünüm verir (pandas 2.x'te Copy-on-Write gerekir)
+enable_copy_on_write()
 
 # 1. Konfigürasyon ve Tema
 st.set_page_config(page_title="Professional Finance Terminal", layout="wide", page_icon="📈")
+rerun_started = time.perf_counter()
 
-# Özel CSS (Bloomberg Terminal Karanlık Tema)
-st.markdown("""
-    <style>
-    .stApp {
-        background-color: #0e1117;
-        color: #fafafa;
-    }
-    .stSelectbox, .stDateInput, .stTextInput {
-        color: #fafafa;
-    }
-    div[data-testid="stMetricValue"] {
-        font-size: 24px;
-        color: #00ff00;
-    }
-    /* AI Analist Kutusu */
-    .ai-analyst-box {
-        background-color: #1e2130;
-        padding: 20px;
-        border-radius: 10px;
-        border-left: 5px solid #00ff00;
-        margin-top: 20px;
-    }
-    .ai-decision {
-        font-size: 24px;
-        font-weight: bold;
-        text-align: center;
-        padding: 10px;
-        border-radius: 5px;
-        color: white;
-    }
-    .badge {
-        background-color: #3b82f6;
-        color: white;
-        padding: 4px 8px;
-        border-radius: 4px;
-        font-size: 12px;
-        font-weight: bold;
-        margin-bottom: 10px;
-        display: inline-block;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+# Özel CSS (Bloomberg Terminal Karanlık Tema), assets/theme.css süreç başına bir kez okunur
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+
+@st.cache_resource
+def load_theme():
+    with open(os.path.join(ASSETS_DIR, "theme.css"), "r", encoding="utf-8") as f:
+        return f"<style>\n{f.read()}</style>"
+
+st.markdown(load_theme(), unsafe_allow_html=True)
 
 # 2. Sidebar ve Kontroller
 st.sidebar.title("Kontrol Paneli")
 
-# Otomatik Yenileme (60sn)
-if st.sidebar.checkbox("🔴 Canlı Veri Modu (60sn)"):
-    st_autorefresh(interval=60000, key="datarefresh")
-
-# Manuel Yenileme
-if st.sidebar.button("🔄 Verileri Şimdi Güncelle"):
-    st.cache_data.clear()
-    st.rerun()
-
-# Genişletilmiş Hisse Listesi
-symbol_list = [
-    'ACSEL.IS', 'ADEL.IS', 'ADESE.IS', 'AEFES.IS', 'AFYON.IS', 'AGESA.IS', 'AGHOL.IS', 'AGYO.IS', 'AHGAZ.IS', 'AKBNK.IS',
-    'AKCNS.IS', 'AKENR.IS', 'AKFGY.IS', 'AKGRT.IS', 'AKMGY.IS', 'AKSA.IS', 'AKSEN.IS', 'AKSGY.IS', 'AKSUE.IS', 'AKYHO.IS',
-    'ALARK.IS', 'ALBRK.IS', 'ALCAR.IS', 'ALCTL.IS', 'ALFAS.IS', 'ALGYO.IS', 'ALKIM.IS', 'ALMAD.IS', 'ALTNY.IS', 'ANELE.IS',
-    'ANGEN.IS', 'ANHYT.IS', 'ANSGR.IS', 'ARASE.IS', 'ARCLK.IS', 'ARDYZ.IS', 'ARENA.IS', 'ARSAN.IS', 'ARZUM.IS', 'ASELS.IS',
-    'ASTOR.IS', 'ASUZU.IS', 'ATAGY.IS', 'ATAKP.IS', 'ATATP.IS', 'ATEKS.IS', 'ATLAS.IS', 'AVGYO.IS', 'AVHOL.IS', 'AVOD.IS',
-    'AVTUR.IS', 'AYCES.IS', 'AYDEM.IS', 'AYEN.IS', 'AYES.IS', 'AYGAZ.IS', 'AZTEK.IS', 'BAGFS.IS', 'BAKAB.IS', 'BALAT.IS',
-    'BANVT.IS', 'BARMA.IS', 'BASCM.IS', 'BASGZ.IS', 'BAYRK.IS', 'BEGYO.IS', 'BERA.IS', 'BEYAZ.IS', 'BFREN.IS', 'BIENY.IS',
-    'BIGCH.IS', 'BIMAS.IS', 'BIOEN.IS', 'BIZIM.IS', 'BJKAS.IS', 'BLCYT.IS', 'BMSCH.IS', 'BMSTL.IS', 'BNTAS.IS', 'BOBET.IS',
-    'BOSSA.IS', 'BRISA.IS', 'BRKO.IS', 'BRKSN.IS', 'BRKVY.IS', 'BRLSM.IS', 'BRMEN.IS', 'BRSAN.IS', 'BRYAT.IS', 'BSOKE.IS',
-    'BTCIM.IS', 'BUCIM.IS', 'BURCE.IS', 'BURVA.IS', 'BVSAN.IS', 'BYDNR.IS', 'CANTE.IS', 'CASA.IS', 'CCOLA.IS', 'CELHA.IS',
-    'CEMAS.IS', 'CEMTS.IS', 'CEOEM.IS', 'CIMSA.IS', 'CLEBI.IS', 'CMBTN.IS', 'CMENT.IS', 'CONSE.IS', 'COSMO.IS', 'CRDFA.IS',
-    'CRFSA.IS', 'CUSAN.IS', 'CVKMD.IS', 'CWENE.IS', 'DAGHL.IS', 'DAGI.IS', 'DAPGM.IS', 'DARDL.IS', 'DENGE.IS', 'DERHL.IS',
-    'DERIM.IS', 'DESA.IS', 'DESPC.IS', 'DEVA.IS', 'DGATE.IS', 'DGGYO.IS', 'DGNMO.IS', 'DIRIT.IS', 'DITAS.IS', 'DMSAS.IS',
-    'DNISI.IS', 'DOAS.IS', 'DOBUR.IS', 'DOCO.IS', 'DOGUB.IS', 'DOHOL.IS', 'DOKTA.IS', 'DURDO.IS', 'DYOBY.IS', 'DZGYO.IS',
-    'EBEBK.IS', 'ECILC.IS', 'ECZYT.IS', 'EDATA.IS', 'EDIP.IS', 'EGEEN.IS', 'EGGUB.IS', 'EGPRO.IS', 'EGSER.IS', 'EKGYO.IS',
-    'EKIZ.IS', 'EKSUN.IS', 'ELITE.IS', 'EMKEL.IS', 'EMNIS.IS', 'ENJSA.IS', 'ENKAI.IS', 'ENSRI.IS', 'EPLAS.IS', 'ERBOS.IS',
-    'ERCB.IS', 'EREGL.IS', 'ERSU.IS', 'ESCAR.IS', 'ESCOM.IS', 'ESEN.IS', 'ETILR.IS', 'ETYAT.IS', 'EUHOL.IS', 'EUKYO.IS',
-    'EUPWR.IS', 'EUREN.IS', 'EUYO.IS', 'FADE.IS', 'FENER.IS', 'FLAP.IS', 'FMIZP.IS', 'FONET.IS', 'FORMT.IS', 'FRIGO.IS',
-    'FROTO.IS', 'FZLGY.IS', 'GARAN.IS', 'GARFA.IS', 'GEDIK.IS', 'GEDZA.IS', 'GENIL.IS', 'GENTS.IS', 'GEREL.IS', 'GESAN.IS',
-    'GLBMD.IS', 'GLRYH.IS', 'GLYHO.IS', 'GMTAS.IS', 'GOKNR.IS', 'GOLTS.IS', 'GOODY.IS', 'GOZDE.IS', 'GRNYO.IS', 'GSDDE.IS',
-    'GSDHO.IS', 'GSRAY.IS', 'GUBRF.IS', 'GWIND.IS', 'GZNMI.IS', 'HALKB.IS', 'HATEK.IS', 'HDFGS.IS', 'HEDEF.IS', 'HEKTS.IS',
-    'HKTM.IS', 'HLGYO.IS', 'HTTBT.IS', 'HUBVC.IS', 'HUNER.IS', 'HURGZ.IS', 'ICBCT.IS', 'IDEAS.IS', 'IDGYO.IS', 'IEYHO.IS',
-    'IHAAS.IS', 'IHEVA.IS', 'IHGZT.IS', 'IHLAS.IS', 'IHLGM.IS', 'IHYAY.IS', 'IMASM.IS', 'INDES.IS', 'INFO.IS', 'INGRM.IS',
-    'INTEM.IS', 'INVEO.IS', 'INVES.IS', 'IOVI.IS', 'IPEKE.IS', 'ISATR.IS', 'ISBTR.IS', 'ISBIR.IS', 'ISCTR.IS', 'ISDMR.IS',
-    'ISFIN.IS', 'ISGSY.IS', 'ISGYO.IS', 'ISKPL.IS', 'ISKUR.IS', 'ISMEN.IS', 'ISSEN.IS', 'ISYAT.IS', 'ITTFH.IS', 'IZENR.IS',
-    'IZFAS.IS', 'IZINV.IS', 'IZMDC.IS', 'JANTS.IS', 'KAPLM.IS', 'KARYE.IS', 'KATMR.IS', 'KAYSE.IS', 'KCAER.IS', 'KCHOL.IS',
-    'KENT.IS', 'KERVN.IS', 'KERVT.IS', 'KFEIN.IS', 'KGYO.IS', 'KIMMR.IS', 'KLGYO.IS', 'KLKIM.IS', 'KLMSN.IS', 'KLNMA.IS',
-    'KLRHO.IS', 'KMPUR.IS', 'KNFRT.IS', 'KONKA.IS', 'KONTR.IS', 'KONYA.IS', 'KOPOL.IS', 'KORDS.IS', 'KOZAA.IS', 'KOZAL.IS',
-    'KRDMA.IS', 'KRDMB.IS', 'KRDMD.IS', 'KRGYO.IS', 'KRONT.IS', 'KRPLS.IS', 'KRSTL.IS', 'KRTEK.IS', 'KRVGD.IS', 'KSTUR.IS',
-    'KTKYO.IS', 'KTSKR.IS', 'KUTPO.IS', 'KUYAS.IS', 'KZBGY.IS', 'KZGYO.IS', 'LIDER.IS', 'LIDFA.IS', 'LINK.IS', 'LKMNH.IS',
-    'LOGO.IS', 'LUKSK.IS', 'MAALT.IS', 'MACKO.IS', 'MAGEN.IS', 'MAKIM.IS', 'MAKTK.IS', 'MANAS.IS', 'MARKA.IS', 'MARTI.IS',
-    'MAVI.IS', 'MEDTR.IS', 'MEGAP.IS', 'MEPET.IS', 'MERCN.IS', 'MERIT.IS', 'MERKO.IS', 'METRO.IS', 'METUR.IS', 'MGROS.IS',
-    'MIATK.IS', 'MIPAZ.IS', 'MMCAS.IS', 'MNDRS.IS', 'MNUHL.IS', 'MOBTL.IS', 'MPARK.IS', 'MRGYO.IS', 'MRSHL.IS', 'MSGYO.IS',
-    'MTRKS.IS', 'MTRYO.IS', 'MUNDA.IS', 'NATURE.IS', 'NETAS.IS', 'NIBAS.IS', 'NTGAZ.IS', 'NTHOL.IS', 'NUGYO.IS', 'NUHCM.IS',
-    'OBASE.IS', 'ODAS.IS', 'OFSYM.IS', 'ONCSM.IS', 'ORCAY.IS', 'ORGE.IS', 'ORMA.IS', 'OSMEN.IS', 'OSTIM.IS', 'OTKAR.IS',
-    'OTTO.IS', 'OYAKC.IS', 'OYAYO.IS', 'OYLUM.IS', 'OYYAT.IS', 'OZBAL.IS', 'OZGYO.IS', 'OZKGY.IS', 'OZRDN.IS', 'OZSUB.IS',
-    'PAGYO.IS', 'PAMEL.IS', 'PAPIL.IS', 'PARSN.IS', 'PASEU.IS', 'PCILT.IS', 'PEGYO.IS', 'PEKGY.IS', 'PENGD.IS', 'PENTA.IS',
-    'PETKM.IS', 'PETUN.IS', 'PGSUS.IS', 'PINSU.IS', 'PKART.IS', 'PKENT.IS', 'PLTUR.IS', 'PNLSN.IS', 'PNSUT.IS', 'POLHO.IS',
-    'POLTK.IS', 'PRDGS.IS', 'PRKAB.IS', 'PRKME.IS', 'PRZMA.IS', 'PSGYO.IS', 'QNBFL.IS', 'QUAGR.IS', 'RALYH.IS', 'RAYSG.IS',
-    'RNPOL.IS', 'RODRG.IS', 'ROYAL.IS', 'RTALB.IS', 'RUBNS.IS', 'RYGYO.IS', 'RYSAS.IS', 'SAHOL.IS', 'SAMAT.IS', 'SANEL.IS',
-    'SANFM.IS', 'SANKO.IS', 'SARKY.IS', 'SASA.IS', 'SAYAS.IS', 'SDTTR.IS', 'SEKFK.IS', 'SEKUR.IS', 'SELEC.IS', 'SELGD.IS',
-    'SELVA.IS', 'SEYKM.IS', 'SILVR.IS', 'SISE.IS', 'SKBNK.IS', 'SKTAS.IS', 'SMART.IS', 'SMRTG.IS', 'SNGYO.IS', 'SNKRN.IS',
-    'SNPAM.IS', 'SODSN.IS', 'SOKE.IS', 'SOKM.IS', 'SONME.IS', 'SRVGY.IS', 'SUMAS.IS', 'SUNTK.IS', 'SUWEN.IS', 'TATGD.IS',
-    'TAVHL.IS', 'TBORG.IS', 'TCELL.IS', 'TDGYO.IS', 'TEKTU.IS', 'TERA.IS', 'TETMT.IS', 'TEZOL.IS', 'TGSAS.IS', 'THYAO.IS',
-    'TKFEN.IS', 'TKNSA.IS', 'TLMAN.IS', 'TMPOL.IS', 'TMSN.IS', 'TNZTP.IS', 'TOASO.IS', 'TRCAS.IS', 'TRGYO.IS', 'TRILC.IS',
-    'TSGYO.IS', 'TSKB.IS', 'TSPOR.IS', 'TTKOM.IS', 'TTRAK.IS', 'TUCLK.IS', 'TUKAS.IS', 'TUPRS.IS', 'TURGG.IS', 'TURSG.IS',
-    'UFUK.IS', 'ULAS.IS', 'ULKER.IS', 'ULUFA.IS', 'ULUSE.IS', 'ULUUN.IS', 'UNLU.IS', 'USAK.IS', 'UYUM.IS', 'VAKBN.IS',
-    'VAKFN.IS', 'VAKKO.IS', 'VANGD.IS', 'VBTYZ.IS', 'VERTU.IS', 'VERUS.IS', 'VESBE.IS', 'VESTL.IS', 'VKFYO.IS', 'VKGYO.IS',
-    'VKING.IS', 'YAPRK.IS', 'YATAS.IS', 'YAYLA.IS', 'YEOTK.IS', 'YESIL.IS', 'YGGYO.IS', 'YGYO.IS', 'YKBNK.IS', 'YKSLN.IS',
-    'YONGA.IS', 'YUNSA.IS', 'YYAPI.IS', 'YYLGD.IS', 'ZEDUR.IS', 'ZOREN.IS', 'ZRGYO.IS', 
-    'BTC-USD', 'ETH-USD', 'BNB-USD', 'SOL-USD', 'XRP-USD', 'ADA-USD', 'DOGE-USD', 'AVAX-USD', 'TRX-USD', 'DOT-USD', 'MATIC-USD',
-    'USDTRY=X', 'EURTRY=X', 'GBPTRY=X', 'XAUUSD=X', 'XAGUSD=X', 'GC=F', 'CL=F', 'SI=F', 'NG=F'
-]
-symbol_list.sort()
+# Canlı mod (otomatik yenileme aralığı zaman dilimi seçildikten sonra belirlenir)
+live_mode = st.sidebar.checkbox("🔴 Canlı Veri Modu")
+
+# Manuel Yenileme (sadece seçili sembol, aşağıda veri yüklenmeden önce)
+refresh_requested = st.sidebar.button("🔄 Verileri Şimdi Güncelle")
+
+# Aşama süreleri süreç genelinde toplanır (tüm oturumlar)
+@st.cache_resource
+def get_stage_metrics():
+    return StageMetrics()
+
+metrics = get_stage_metrics()
+
+# Performans paneli ve tek bir çalıştırmanın profili (isteğe bağlı)
+show_perf = st.sidebar.checkbox("⏱️ Performans Paneli")
+rerun_profiler = None
+if show_perf and st.sidebar.button("🔬 Bu Çalıştırmayı Profille"):
+    rerun_profiler = RerunProfiler().start()
+
+# Sembol evreni (universe.csv, süreç başına bir kez yüklenir; liste zaten sıralı)
+universe = get_universe()
+symbol_list = universe.symbols
 
 # ---------------------------
 # SESSION STATE & SELECTOR CONFIG
@@ -133,16 +80,18 @@ def update_ticker_from_select():
     st.session_state.ticker_input = "" 
 
 def update_ticker_from_text():
+    st.session_state.ticker_error = None
     if st.session_state.ticker_input:
-        st.session_state.selected_symbol = st.session_state.ticker_input.upper()
+        instrument, error = universe.resolve(st.session_state.ticker_input)
+        if instrument is None:
+            st.session_state.ticker_error = error
+        else:
+            st.session_state.selected_symbol = instrument.symbol
 
 st.sidebar.markdown("### Hisse/Coin Seçimi")
 
 # Listede varsa indexini bul, yoksa 0 (varsayılan)
-try:
-    sel_index = symbol_list.index(st.session_state.selected_symbol)
-except ValueError:
-    sel_index = 0
+sel_index = universe.index(st.session_state.selected_symbol)
 
 search_ticker = st.sidebar.selectbox(
     "Listeden Seç:", 
@@ -158,138 +107,311 @@ manual_ticker = st.sidebar.text_input(
     on_change=update_ticker_from_text
 )
 
+if st.session_state.get("ticker_error"):
+    st.sidebar.error(st.session_state.ticker_error)
+# Listede olmayan girişte bu önekle başlayan semboller öneri olarak gösterilir
+typed_ticker = manual_ticker.strip().upper()
+if typed_ticker and typed_ticker not in universe:
+    suggestions = universe.search(typed_ticker)
+    if suggestions:
+        st.sidebar.caption("Öneriler: " + ", ".join(suggestions))
+
 # Seçili olanı session state'den al
 selected_ticker = st.session_state.selected_symbol
+selected_instrument = universe.instrument(selected_ticker)
+st.sidebar.caption(
+    f"{selected_instrument.exchange or '—'} · {ASSET_CLASSES.get(selected_instrument.asset_class, selected_instrument.asset_class)}"
+    f" · {selected_instrument.currency}" + ("" if selected_ticker in universe else " · listede yok")
+)
 
 # ---------------------------
 # PERİYOT SEÇİCİ
 # ---------------------------
 st.sidebar.markdown("### Analiz Periyodu")
-intervals = {
-    "1 Gün (Orta Vade - Swing)": {"period": "1y", "interval": "1d", "mode": "SWING"},
-    "1 Hafta (Uzun Vade - Yatırımcı)": {"period": "2y", "interval": "1wk", "mode": "YATIRIMCI"},
-    "1 Ay (Makro Bakış)": {"period": "5y", "interval": "1mo", "mode": "YATIRIMCI"},
-    "4 Saat (Trade)": {"period": "1y", "interval": "60m", "mode": "TRADER"},
-    "1 Saat (Day Trade)": {"period": "6mo", "interval": "60m", "mode": "TRADER"},
-    "15 Dakika (Scalp)": {"period": "1mo", "interval": "15m", "mode": "SCALPER"},
-    "5 Dakika (Hızlı Scalp)": {"period": "5d", "interval": "5m", "mode": "SCALPER"}
-}
+intervals = INTERVALS
 
 period_selection = st.sidebar.selectbox("Zaman Dilimi Seçin:", list(intervals.keys()), index=0)
 selected_params = intervals[period_selection]
 
+# Canlı mod: gün içi dilimlerde fiyatlar akıştan barlara katlanır ve sayfa yalnız izlenen
+# barın sürümü değiştiğinde yenilenir; günlük ve üstü dilimlerde dakikalık yenileme yeterli
+LIVE_REFRESH_MS = 60000
+live_code = timeframe_code(selected_params)
+live_streaming = live_mode and bar_step(live_code) < pd.Timedelta(days=1)
+if live_mode and not live_streaming:
+    # Bileşen kaydı ~0.1 sn sürer; yalnız gerektiğinde yüklenir
+    from streamlit_autorefresh import st_autorefresh
+    st_autorefresh(interval=LIVE_REFRESH_MS, key="datarefresh")
+
 # 3. Veri Çekme Fonksiyonu
-@st.cache_data(ttl=15)
-def get_data(ticker, period, interval):
+# Veri sağlayıcı (FINANS_PROVIDER=replay ile ağsız, yerel/sentetik veri)
+@st.cache_resource
+def get_market_data_provider():
+    return get_provider()
+
+# Kalıcı bar deposu (süreç başına tek örnek, yeniden başlatmalarda disktekini okur)
+@st.cache_resource
+def get_bar_store():
+    return BarStore()
+
+# Süreç genelinde paylaşılan önbellek: aynı anahtar için tek indirme, eski veri
+# hemen döner ve arka planda tek bir yenileme çalışır
+DATA_TTL = 15
+DATA_STALE_TTL = 120
+# Canlı akış açıkken son barlar akıştan gelir; geçmiş bu kadar seyrek yenilenir
+LIVE_HISTORY_TTL = 600
+# worker.py çalışıyorsa bu süreden yeni güncellenmiş barlar için indirme yapılmaz
+# (bir döngü aralığı + döngünün kendi süresi için bir TTL pay)
+STORE_MAX_AGE = float(os.environ.get("FINANS_STORE_MAX_AGE", WORKER_EVERY + DATA_TTL))
+# Arka plan servisinin sinyal görüntüsü bu süreden eskiyse kullanılmaz
+SNAPSHOT_MAX_AGE = 600
+
+@st.cache_resource
+def get_fetch_coordinator():
+    return FetchCoordinator()
+
+def load_data(store, provider, ticker, period, interval, fetch_period=None, max_age=STORE_MAX_AGE):
     try:
-        df = yf.download(ticker, period=period, interval=interval, progress=False)
-        
-        # MultiIndex Düzeltmesi
-        if isinstance(df.columns, pd.MultiIndex):
-            df.columns = df.columns.get_level_values(0)
-        
-        # Datetime index name fix
-        df.index.name = 'Date'
+        # Sadece son kayıtlı bardan sonrası indirilir, geçmiş diskten gelir
+        df = store.get(ticker, period, interval, provider, fetch_period, max_age)
         
-        if df.empty:
+        if df is None or df.empty:
             return None
         return df
     except Exception as e:
+        # İndirme başarısızsa diskteki son veri gösterilir
+        return store.peek(ticker, period, interval)
+
+def get_data(ticker, period, interval, fetch_period=None, ttl=DATA_TTL, warm=True, max_age=STORE_MAX_AGE):
+    # warm: süreçte henüz kayıt yoksa diskteki veri hemen döner, indirme arka planda sürer
+    # max_age: depo bu kadar saniye içinde güncellendiyse indirme yapılmaz (0: her zaman indir)
+    store = get_bar_store()
+    loader = partial(load_data, store, get_market_data_provider(), ticker, period, interval, fetch_period, max_age)
+    initial = partial(store.peek, ticker, period, interval) if warm else None
+    return get_fetch_coordinator().get(("bars", ticker, period, interval), loader, ttl=ttl,
+                                       stale_ttl=max(ttl, DATA_STALE_TTL), initial=initial)
+
+# Türetilmiş zaman dilimleri (4s, 2s, 30dk) temel barlardan yerelde üretilir
+def get_timeframe_data(ticker, params, ttl=DATA_TTL, warm=True, max_age=STORE_MAX_AGE):
+    df = get_data(ticker, params["period"], params["interval"], params.get("fetch_period"), ttl, warm, max_age)
+    if df is None or "resample" not in params:
+        return df
+    return resample_ohlcv(df, params["resample"], ticker)
+
+# PİYASA TARAMASI (PARÇALI, EŞZAMANLI İNDİRME)
+MARKET_SCAN_TTL = 300 # 5 dk cache
+MARKET_SCAN_DEADLINE = 60 # Toplam tarama süresi sınırı (sn)
+
+# Son tarama sonucu (alt evren başına) süreç genelinde paylaşılır
+@st.cache_resource
+def get_market_scan_cache():
+    return {}
+
+def iter_market_trends(symbols):
+    # Parçalar tamamlandıkça (sonuçlar, raporlar) döndürür
+    cache = get_market_scan_cache()
+    entry = cache.get(symbols)
+    if entry and time.time() - entry["time"] < MARKET_SCAN_TTL:
+        metrics.count("market_scan", "hit")
+        yield entry["results"], entry["reports"]
+        return
+    metrics.count("market_scan", "miss")
+    
+    frames = []
+    reports = []
+    results_df = pd.DataFrame()
+    # We fetch 5 days to be safe against weekends/holidays
+    for report, rows in scan(symbols, get_market_data_provider().fetch_batch, period="5d", deadline=MARKET_SCAN_DEADLINE):
+        reports.append(report)
+        if rows is not None and not rows.empty:
+            frames.append(rows)
+            results_df = pd.concat(frames, ignore_index=True)
+        yield results_df, reports
+    
+    if not results_df.empty:
+        cache[symbols] = {"time": time.time(), "results": results_df, "reports": reports}
+
+def get_market_trends(symbols=symbol_list):
+    results_df = pd.DataFrame()
+    for results_df, _ in iter_market_trends(symbols):
+        pass
+    return results_df
+
+# AI SİNYAL TARAMASI (TÜM EVREN)
+def load_signal_screen(provider, symbols, period, interval, resample, mode):
+    fetch = partial(provider.fetch_batch, interval=interval)
+    results, _ = screen_universe(symbols, fetch, period, mode, deadline=MARKET_SCAN_DEADLINE, resample=resample)
+    if results.empty:
+        # Boş sonuç önbelleğe alınmasın
+        raise ValueError("tarama sonucu boş")
+    return results
+
+def get_signal_screen(period, interval, resample, mode, asset_class=None):
+    try:
+        symbols = universe.select(asset_class=asset_class)
+        loader = partial(load_signal_screen, get_market_data_provider(), symbols, period, interval, resample, mode)
+        return get_fetch_coordinator().get(("screen", period, interval, resample, mode, asset_class), loader, ttl=MARKET_SCAN_TTL)
+    except Exception:
+        return pd.DataFrame()
+
+# RİSK MATRİSİ (ALT EVREN, GÜNLÜK GETİRİLER)
+RISK_PERIOD = "1y"
+# Isı haritasında gösterilen en fazla sembol (matrisin tamamı yine hesaplanır)
+RISK_HEATMAP_MAX = 40
+
+def load_risk_returns(provider, symbols, benchmark, period):
+    symbols = [s for s in symbols if s != benchmark] + [benchmark]
+    df_batch, _ = fetch_universe(symbols, partial(provider.fetch_batch, interval="1d"), period, deadline=MARKET_SCAN_DEADLINE)
+    if df_batch is None:
+        raise ValueError("risk verisi alınamadı")
+    return universe_returns(df_batch, symbols)
+
+def get_risk_returns(asset_class, benchmark, period=RISK_PERIOD):
+    try:
+        loader = partial(load_risk_returns, get_market_data_provider(), universe.select(asset_class=asset_class), benchmark, period)
+        return get_fetch_coordinator().get(("risk", asset_class, benchmark, period), loader, ttl=MARKET_SCAN_TTL)
+    except Exception:
         return None
 
-# PİYASA TARAMASI (BATCH DOWNLOAD)
-@st.cache_data(ttl=300) # 5 dk cache
-def get_market_trends():
-    try:
-        # We fetch 5 days to be safe against weekends/holidays
-        tickers_str = " ".join(symbol_list)
-        df_batch = yf.download(tickers_str, period="5d", group_by='ticker', progress=False)
-        
-        results = []
-        
-        for ticker in symbol_list:
-            try:
-                # Access data for this ticker safely
-                if isinstance(df_batch.columns, pd.MultiIndex):
-                    data = df_batch[ticker]
-                else:
-                    # Single ticker or flat structure fallback
-                    data = df_batch if ticker == list(df_batch.columns)[0] else None
-                
-                if data is None or data.empty:
-                    continue
-                    
-                # Drop NA and verify we have enough data
-                data = data.dropna(subset=['Close'])
-                if len(data) < 2:
-                    continue
-                
-                last_close = data['Close'].iloc[-1]
-                prev_close = data['Close'].iloc[-2]
-                volume = data['Volume'].iloc[-1]
-                
-                pct_change = ((last_close - prev_close) / prev_close) * 100
-                
-                results.append({
-                    "Symbol": ticker,
-                    "Price": last_close,
-                    "Change %": pct_change,
-                    "Volume": volume
-                })
-            except Exception:
-                continue
-                
-        results_df = pd.DataFrame(results)
-        return results_df
-            
-    except Exception as e:
-        return pd.DataFrame() # Return empty if fails
+# Kayan momentler (alt evren, benchmark, pencere) başına süreç boyunca yaşar;
+# yeni günlük bar geldiğinde matris baştan değil artımlı güncellenir
+@st.cache_resource
+def get_risk_moments():
+    return {}
+
+def get_rolling_moments(key, window):
+    # key: (alt evren, benchmark, periyot, pencere)
+    moments = get_risk_moments()
+    if key not in moments:
+        moments.setdefault(key, RollingMoments(window))
+    return moments[key]
+
+# Canlı fiyat akışı (süreç başına tek arka plan döngüsü, tüm oturumların abonelikleri)
+@st.cache_resource
+def get_live_feed():
+    return LiveFeed(get_quote_source())
+
+def apply_live_bars(ticker, code, df):
+    # Geçmiş barlara akıştan yalnız henüz indirilmemiş barlar ve oluşmakta olan bar eklenir.
+    # Sürüm barlardan önce okunur: arada gelen fiyat bir sonraki kontrolde yenileme tetikler.
+    feed = get_live_feed()
+    feed.subscribe(ticker, code, history=df)
+    version = feed.version(ticker, code)
+    live = feed.bars(ticker, code)
+    if live is None:
+        return df, version
+    live = align_index(live, df.index, ticker).astype(df.dtypes[live.columns].to_dict())
+    return merge_live(df, live), version
+
+# Akış turu başına yalnız bu parça çalışır; tam sayfa (indikatörler, grafikler) yalnız
+# izlenen barın sürümü değiştiğinde yeniden çalışır. Açık sayfa aboneliği canlı tutar.
+@st.fragment(run_every=LIVE_POLL_SECONDS)
+def watch_live_bars(ticker, code, history):
+    feed = get_live_feed()
+    feed.subscribe(ticker, code, history=history)
+    if feed.version(ticker, code) != st.session_state.get("live_version"):
+        st.rerun()
+    stats = feed.stats
+    if stats["last_poll"]:
+        st.caption(f"Canlı akış: son fiyat {time.time() - stats['last_poll']:.0f} sn önce · "
+                   f"{len(feed.subscriptions())} abonelik")
+
+# Manuel yenilemede sadece seçili sembolün kayıtları geçersiz kılınır
+if refresh_requested:
+    get_fetch_coordinator().invalidate(lambda key: key[0] == "bars" and key[1] == selected_ticker)
 
 # Veriyi Yükle (Ana Sekmeler İçin)
-df = get_data(selected_ticker, selected_params["period"], selected_params["interval"])
+with metrics.timer("data_load"):
+    # Manuel yenilemede diskteki veriyle yetinilmez (worker.py yeni güncellemiş olsa da), indirme beklenir
+    df = get_timeframe_data(selected_ticker, selected_params, LIVE_HISTORY_TTL if live_streaming else DATA_TTL,
+                            warm=not refresh_requested, max_age=0 if refresh_requested else STORE_MAX_AGE)
+# Deponun geçmiş revizyon sayacı (canlı barlar eklenmeden önce okunur)
+bars_revision = None if df is None else df.attrs.get(REVISION_ATTR)
+if get_fetch_coordinator().pending(("bars", selected_ticker, selected_params["period"], selected_params["interval"])):
+    st.sidebar.caption("⏳ Önbellekteki veri gösteriliyor; güncel barlar arka planda indiriliyor.")
+
+if live_streaming and df is not None and not df.empty:
+    history_df = df
+    with metrics.timer("live"):
+        df, live_version = apply_live_bars(selected_ticker, live_code, df)
+    st.session_state["live_version"] = live_version
+    with st.sidebar:
+        watch_live_bars(selected_ticker, live_code, history_df)
 
 # 4. Teknik Analiz Hesaplamaları
-def calculate_rsi(data, window=14):
-    delta = data['Close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=window).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=window).mean()
-    rs = gain / loss
-    return 100 - (100 / (1 + rs))
-
-def calculate_macd(data, slow=26, fast=12, signal=9):
-    exp1 = data['Close'].ewm(span=fast, adjust=False).mean()
-    exp2 = data['Close'].ewm(span=slow, adjust=False).mean()
-    macd = exp1 - exp2
-    signal_line = macd.ewm(span=signal, adjust=False).mean()
-    return macd, signal_line
-
-def calculate_bollinger(data, window=20, no_of_std=2):
-    rolling_mean = data['Close'].rolling(window).mean()
-    rolling_std = data['Close'].rolling(window).std()
-    upper_band = rolling_mean + (rolling_std * no_of_std)
-    lower_band = rolling_mean - (rolling_std * no_of_std)
-    return upper_band, rolling_mean, lower_band
-
-def calculate_cci(data, ndays=20): 
-    tp = (data['High'] + data['Low'] + data['Close']) / 3 
-    cci = (tp - tp.rolling(ndays).mean()) / (0.015 * tp.rolling(ndays).std()) 
-    return cci
+# İndikatör motorları (ticker, interval, periyot) başına süreç boyunca yaşar;
+# her yenilemede sadece yeni/revize edilen barlar hesaplanır.
+@st.cache_resource
+def get_indicator_engines():
+    return {}
+
+def get_indicator_engine(key):
+    engines = get_indicator_engines()
+    if key not in engines:
+        engines.setdefault(key, IndicatorEngine())
+    return engines[key]
 
 # Ana Tablar İçin Veri Varsa İndikatör Hesapla
 if df is not None and not df.empty:
-    df['RSI'] = calculate_rsi(df)
-    df['MACD'], df['Signal'] = calculate_macd(df)
-    df['BB_Upper'], df['BB_Middle'], df['BB_Lower'] = calculate_bollinger(df)
-    df['CCI'] = calculate_cci(df)
-    df['SMA20'] = df['Close'].rolling(window=20).mean()
-    df['SMA50'] = df['Close'].rolling(window=50).mean()
+    engine = get_indicator_engine((selected_ticker, selected_params["interval"], selected_params.get("resample"), selected_params["period"]))
+    with engine.lock, metrics.timer("indicators"):
+        df = engine.update(df, bars_revision)
 
-# 5. Arayüz Sekmeleri
-tab1, tab2, tab3, tab4 = st.tabs(["📊 Piyasa Özeti & AI", "📈 Teknik İndikatörler", "🎲 Monte Carlo Simülasyonu", "🔥 Günün Trendleri"])
-
-# --- TAB 1, 2, 3 SADECE VERİ VARSA ÇALIŞIR ---
+# Grafik Ayarları: nokta bütçesi ve yakınlaştırma aralığı.
+# Seçili aralık tam çözünürlükten kesilir, sonra bütçeye indirgenir.
+chart_df = df
+if df is not None and not df.empty:
+    st.sidebar.markdown("### Grafik Ayarları")
+    point_budget = st.sidebar.select_slider("Grafik Nokta Bütçesi", options=[500, 1000, 1500, 2500, 5000], value=DEFAULT_POINT_BUDGET)
+    if len(df) > point_budget:
+        bar_times = df.index.tz_localize(None) if df.index.tz is not None else df.index
+        zoom = st.sidebar.slider(
+            "Grafik Aralığı",
+            min_value=bar_times[0].to_pydatetime(),
+            max_value=bar_times[-1].to_pydatetime(),
+            value=(bar_times[0].to_pydatetime(), bar_times[-1].to_pydatetime()),
+            key=f"zoom_{selected_ticker}_{period_selection}",
+        )
+        chart_df = df[(bar_times >= zoom[0]) & (bar_times <= zoom[1])]
+
+# 5. Arayüz Görünümleri
+# st.tabs her sekmeyi her çalıştırmada hesaplar; seçici ile yalnız görünen
+# görünümün grafikleri ve simülasyonu hesaplanıp gönderilir.
+VIEW_SUMMARY = "📊 Piyasa Özeti & AI"
+VIEW_INDICATORS = "📈 Teknik İndikatörler"
+VIEW_MONTE_CARLO = "🎲 Monte Carlo Simülasyonu"
+VIEW_BACKTEST = "🧪 Geriye Dönük Test"
+VIEW_TRENDS = "🔥 Günün Trendleri"
+VIEW_RISK = "🧮 Risk Matrisi"
+# Evren görünümleri seçili sembolün verisine bağlı değildir
+UNIVERSE_VIEWS = (VIEW_TRENDS, VIEW_RISK)
+active_view = st.radio("Görünüm", [VIEW_SUMMARY, VIEW_INDICATORS, VIEW_MONTE_CARLO, VIEW_BACKTEST, VIEW_TRENDS, VIEW_RISK],
+                       horizontal=True, key="active_view", label_visibility="collapsed")
+
+# plotly yalnız grafik çizen görünümlerde yüklenir
+if active_view != VIEW_TRENDS:
+    import plotly.graph_objects as go
+
+# Monte Carlo sonucu (sembol, zaman dilimi, son bar, ayarlar) başına saklanır.
+# Tohum aynı anahtardan türetildiği için yenilemelerde grafik rastgele değişmez.
+MONTE_CARLO_TTL = 3600
+
+def load_monte_carlo(last_close, returns, horizon, n_paths, method, bootstrap, seed):
+    return simulate(last_close, returns, horizon=horizon, n_paths=n_paths,
+                    method=method, bootstrap=bootstrap, seed=seed)
+
+def get_monte_carlo(ticker, params, df, horizon, n_paths, method, bootstrap):
+    last_close = float(df['Close'].iloc[-1])
+    bar_key = (ticker, params["interval"], params.get("resample"), params["period"], df.index[-1].isoformat())
+    key = ("monte_carlo",) + bar_key + (last_close, horizon, n_paths, method, bootstrap)
+    seed = zlib.crc32(repr(bar_key).encode())
+    returns = df['Close'].pct_change().dropna().to_numpy()
+    loader = partial(load_monte_carlo, last_close, returns, horizon, n_paths, method, bootstrap, seed)
+    return get_fetch_coordinator().get(key, loader, ttl=MONTE_CARLO_TTL)
+
+# --- ÖZET, İNDİKATÖR VE MONTE CARLO SADECE VERİ VARSA ÇALIŞIR ---
 if df is not None and not df.empty:
-    with tab1:
+    if active_view == VIEW_SUMMARY:
         st.subheader(f"{selected_ticker} Piyasa Özeti ({selected_params['mode']} Modu)")
         
         last_price = df['Close'].iloc[-1]
@@ -303,17 +425,23 @@ if df is not None and not df.empty:
         col1, col2 = st.columns(2)
         col1.metric("Güncel Fiyat", f"{last_price:.2f}", f"{daily_change:.2f}%")
         
-        fig = go.Figure()
-        fig.add_trace(go.Candlestick(x=df.index,
-                    open=df['Open'], high=df['High'], low=df['Low'], close=df['Close'],
-                    name=selected_ticker))
+        with metrics.timer("tab1_chart"):
+            candles = ohlc_buckets(chart_df, point_budget)
+            bb_upper = lttb_series(chart_df['BB_Upper'], point_budget)
+            bb_middle = lttb_series(chart_df['BB_Middle'], point_budget)
+            bb_lower = lttb_series(chart_df['BB_Lower'], point_budget)
+        
+            fig = go.Figure()
+            fig.add_trace(go.Candlestick(x=candles.index,
+                        open=candles['Open'], high=candles['High'], low=candles['Low'], close=candles['Close'],
+                        name=selected_ticker))
         
-        fig.add_trace(go.Scatter(x=df.index, y=df['BB_Upper'], line=dict(color='gray', width=1), name='BB Üst'))
-        fig.add_trace(go.Scatter(x=df.index, y=df['BB_Middle'], line=dict(color='orange', width=1), name='BB Orta'))
-        fig.add_trace(go.Scatter(x=df.index, y=df['BB_Lower'], line=dict(color='gray', width=1), name='BB Alt'))
+            fig.add_trace(go.Scatter(x=bb_upper.index, y=bb_upper, line=dict(color='gray', width=1), name='BB Üst'))
+            fig.add_trace(go.Scatter(x=bb_middle.index, y=bb_middle, line=dict(color='orange', width=1), name='BB Orta'))
+            fig.add_trace(go.Scatter(x=bb_lower.index, y=bb_lower, line=dict(color='gray', width=1), name='BB Alt'))
 
-        fig.update_layout(template='plotly_dark', title=f'{selected_ticker} - {period_selection}', height=600)
-        st.plotly_chart(fig, use_container_width=True)
+            fig.update_layout(template='plotly_dark', title=f'{selected_ticker} - {period_selection}', height=600)
+            st.plotly_chart(fig, use_container_width=True)
 
         # AI Analist
         st.markdown("---")
@@ -322,179 +450,308 @@ if df is not None and not df.empty:
         active_mode = selected_params["mode"]
         st.markdown(f'<span class="badge">{active_mode} ANALİZİ DEVREDE</span>', unsafe_allow_html=True)
         
-        current_rsi = df['RSI'].iloc[-1]
-        current_macd = df['MACD'].iloc[-1]
-        current_signal = df['Signal'].iloc[-1]
-        current_sma20 = df['SMA20'].iloc[-1]
-        current_sma50 = df['SMA50'].iloc[-1]
-        current_price = df['Close'].iloc[-1]
+        with metrics.timer("ai_scoring"):
+            last_bar = df.iloc[-1]
+            current_values = {
+                'RSI': last_bar['RSI'],
+                'MACD': last_bar['MACD'],
+                'Signal': last_bar['Signal'],
+                'SMA20': last_bar['SMA20'],
+                'SMA50': last_bar['SMA50'],
+                'Close': last_bar['Close'],
+            }
         
-        signals = []
-        score = 0 
-        
-        if active_mode == "SCALPER":
-            if current_rsi < 30:
-                signals.append("⚡ **SCALP FIRSATI:** RSI 30 altında! Anlık tepki alımı beklenebilir.")
-                score += 3
-            elif current_rsi > 70:
-                signals.append("⚡ **DİKKAT:** RSI 70 üzerinde. Hızlı bir satış gelebilir.")
-                score -= 3
-            else:
-                signals.append(f"⚪ **RSI:** {current_rsi:.1f} ile nötr. İşlem kovalamak için erken.")
-                
-            if current_macd > current_signal:
-                signals.append("✅ **Momentum:** MACD pozitif, kısa vadeli alımlar destekleniyor.")
-                score += 1
-            else:
-                signals.append("🔻 **Momentum:** MACD negatif, kısa vadeli baskı var.")
-                score -= 1
-
-        elif active_mode == "TRADER" or active_mode == "SWING":
-            if current_price > current_sma20:
-                signals.append("✅ **Trend:** Fiyat 20 periyotluk ortalamanın üzerinde. Yön yukarı.")
-                score += 1
-            else:
-                signals.append("🔻 **Trend:** Fiyat kısa vade ortalamanın altında. Temkinli ol.")
-                score -= 1
-                
-            if current_rsi < 30:
-                signals.append("✅ **Dip Avı:** Aşırı satım bölgesindeyiz. Dönüş mumları ara.")
-                score += 2
-            elif current_rsi > 70:
-                signals.append("🔻 **Kar Realizasyonu:** Fiyat şişmiş, düzeltme riski yüksek.")
-                score -= 2
-
-        elif active_mode == "YATIRIMCI":
-            if current_sma20 > current_sma50:
-                signals.append("✅ **Altın Vuruş:** Golden Cross aktif (Kısa vade ortalama, uzun vadeyi yukarı kesti).")
-                score += 2
-            elif current_sma20 < current_sma50:
-                signals.append("🔻 **Death Cross:** Düşüş trendi baskın (Death Cross). Acele etme.")
-                score -= 2
-                
-            if current_rsi < 40: 
-                signals.append("✅ **Toplama Bölgesi:** RSI düşük seviyelerde, kademeli alım düşünülebilir.")
-                score += 1
-            elif current_rsi > 80:
-                signals.append("🔻 **Aşırı Prim:** Çok hızlı yükselmiş, uzun vade için pahalı olabilir.")
-                score -= 1
+            score, signals = evaluate(active_mode, current_values)
+            decision_text, decision_color = decision(score)
 
         for signal in signals:
             st.write(signal)
 
-        decision_text = ""
-        decision_color = ""
-        
-        if score >= 3:
-            decision_text = "GÜÇLÜ AL 🚀"
-            decision_color = "green"
-        elif score >= 1:
-            decision_text = "AL 🟢"
-            decision_color = "lightgreen"
-        elif score <= -3:
-            decision_text = "GÜÇLÜ SAT 🛑"
-            decision_color = "red"
-        elif score <= -1:
-            decision_text = "SAT 🔴"
-            decision_color = "orange"
-        else:
-            decision_text = "NÖTR / BEKLE ⚪"
-            decision_color = "gray"
-
         st.markdown(f'<div class="ai-decision" style="background-color:{decision_color};">{decision_text}</div>', unsafe_allow_html=True)
         st.markdown('</div>', unsafe_allow_html=True)
 
-    with tab2:
+    elif active_view == VIEW_INDICATORS:
         st.subheader("Teknik İndikatörler")
-        fig_rsi = go.Figure()
-        fig_rsi.add_trace(go.Scatter(x=df.index, y=df['RSI'], name='RSI', line=dict(color='purple')))
-        fig_rsi.add_hline(y=70, line_dash="dash", line_color="red")
-        fig_rsi.add_hline(y=30, line_dash="dash", line_color="green")
-        fig_rsi.update_layout(template='plotly_dark', title='RSI', height=250)
-        st.plotly_chart(fig_rsi, use_container_width=True)
+        with metrics.timer("tab2_charts"):
+            fig_rsi = go.Figure()
+            rsi_points = lttb_series(chart_df['RSI'], point_budget)
+            fig_rsi.add_trace(go.Scatter(x=rsi_points.index, y=rsi_points, name='RSI', line=dict(color='purple')))
+            fig_rsi.add_hline(y=70, line_dash="dash", line_color="red")
+            fig_rsi.add_hline(y=30, line_dash="dash", line_color="green")
+            fig_rsi.update_layout(template='plotly_dark', title='RSI', height=250)
+            st.plotly_chart(fig_rsi, use_container_width=True)
         
-        fig_macd = go.Figure()
-        fig_macd.add_trace(go.Scatter(x=df.index, y=df['MACD'], name='MACD', line=dict(color='blue')))
-        fig_macd.add_trace(go.Scatter(x=df.index, y=df['Signal'], name='Sinyal', line=dict(color='orange')))
-        fig_macd.update_layout(template='plotly_dark', title='MACD', height=250)
-        st.plotly_chart(fig_macd, use_container_width=True)
-
-        fig_cci = go.Figure()
-        fig_cci.add_trace(go.Scatter(x=df.index, y=df['CCI'], name='CCI', line=dict(color='cyan')))
-        fig_cci.add_hline(y=100, line_dash="dash", line_color="red")
-        fig_cci.add_hline(y=-100, line_dash="dash", line_color="green")
-        fig_cci.update_layout(template='plotly_dark', title='CCI', height=250)
-        st.plotly_chart(fig_cci, use_container_width=True)
-
-    with tab3:
+            fig_macd = go.Figure()
+            macd_points = lttb_series(chart_df['MACD'], point_budget)
+            signal_points = lttb_series(chart_df['Signal'], point_budget)
+            fig_macd.add_trace(go.Scatter(x=macd_points.index, y=macd_points, name='MACD', line=dict(color='blue')))
+            fig_macd.add_trace(go.Scatter(x=signal_points.index, y=signal_points, name='Sinyal', line=dict(color='orange')))
+            fig_macd.update_layout(template='plotly_dark', title='MACD', height=250)
+            st.plotly_chart(fig_macd, use_container_width=True)
+
+            fig_cci = go.Figure()
+            cci_points = lttb_series(chart_df['CCI'], point_budget)
+            fig_cci.add_trace(go.Scatter(x=cci_points.index, y=cci_points, name='CCI', line=dict(color='cyan')))
+            fig_cci.add_hline(y=100, line_dash="dash", line_color="red")
+            fig_cci.add_hline(y=-100, line_dash="dash", line_color="green")
+            fig_cci.update_layout(template='plotly_dark', title='CCI', height=250)
+            st.plotly_chart(fig_cci, use_container_width=True)
+
+    elif active_view == VIEW_MONTE_CARLO:
         st.subheader("Monte Carlo Simülasyonu (30 Periyot)")
+        mc1, mc2, mc3 = st.columns(3)
+        simulations = mc1.select_slider("Simülasyon Sayısı", options=[1000, 10000, 50000, 100000, 250000], value=10000)
+        mc_method = mc2.selectbox("Getiri Modeli", ["arithmetic", "geometric"], format_func=lambda m: "Aritmetik (Basit Getiri)" if m == "arithmetic" else "Geometrik (Log Getiri)")
+        mc_bootstrap = mc3.checkbox("Tarihsel Getirilerden Örnekle (Bootstrap)")
         days = 30
-        simulations = 50
-        last_close = df['Close'].iloc[-1]
-        if isinstance(last_close, pd.Series): last_close = last_close.iloc[0]
-        returns = df['Close'].pct_change().dropna()
-        daily_vol = returns.std()
-        simulation_df = pd.DataFrame()
-        for i in range(simulations):
-            price_series = [last_close]
-            for _ in range(days):
-                price = price_series[-1] * (1 + np.random.normal(0, daily_vol))
-                price_series.append(price)
-            simulation_df[f'Sim_{i}'] = price_series
-        fig_mc = go.Figure()
-        for col in simulation_df.columns:
-            fig_mc.add_trace(go.Scatter(y=simulation_df[col], mode='lines', 
-                                    line=dict(color='#3fb1ce', width=1), opacity=0.2, showlegend=False))
-        mean_path = simulation_df.mean(axis=1)
-        fig_mc.add_trace(go.Scatter(y=mean_path, mode='lines', name='Ortalama Senaryo', 
-                                line=dict(color='white', width=4)))
-        fig_mc.update_layout(template='plotly_dark', title='Simülasyon', xaxis_title='Süre', yaxis_title='Fiyat')
-        st.plotly_chart(fig_mc, use_container_width=True)
-        best_case = simulation_df.iloc[-1].quantile(0.95)
-        worst_case = simulation_df.iloc[-1].quantile(0.05)
-        avg_case = mean_path.iloc[-1]
+        with metrics.timer("mc_simulate"):
+            sim = get_monte_carlo(selected_ticker, selected_params, df, days, simulations, mc_method, mc_bootstrap)
+        with metrics.timer("mc_chart"):
+            bands = sim["bands"]
+            fig_mc = go.Figure()
+            # Örnek yollar (N iz yerine birkaç tane)
+            for path in sim["samples"][:10]:
+                fig_mc.add_trace(go.Scatter(y=path, mode='lines', 
+                                        line=dict(color='#3fb1ce', width=1), opacity=0.2, showlegend=False))
+            # Yüzdelik bantlar
+            fig_mc.add_trace(go.Scatter(y=bands[95], mode='lines', line=dict(width=0), showlegend=False))
+            fig_mc.add_trace(go.Scatter(y=bands[5], mode='lines', line=dict(width=0), fill='tonexty',
+                                    fillcolor='rgba(63,177,206,0.15)', name='%5 - %95'))
+            fig_mc.add_trace(go.Scatter(y=bands[75], mode='lines', line=dict(width=0), showlegend=False))
+            fig_mc.add_trace(go.Scatter(y=bands[25], mode='lines', line=dict(width=0), fill='tonexty',
+                                    fillcolor='rgba(63,177,206,0.35)', name='%25 - %75'))
+            fig_mc.add_trace(go.Scatter(y=bands[50], mode='lines', name='Medyan',
+                                    line=dict(color='#3fb1ce', width=2, dash='dash')))
+            mean_path = sim["mean"]
+            fig_mc.add_trace(go.Scatter(y=mean_path, mode='lines', name='Ortalama Senaryo', 
+                                    line=dict(color='white', width=4)))
+            fig_mc.update_layout(template='plotly_dark', title=f'Simülasyon ({sim["n_paths"]:,} yol)', xaxis_title='Süre', yaxis_title='Fiyat')
+            st.plotly_chart(fig_mc, use_container_width=True)
+        best_case = bands[95][-1]
+        worst_case = bands[5][-1]
+        avg_case = mean_path[-1]
         m1, m2, m3 = st.columns(3)
         m1.metric("En İyi Senaryo (95%)", f"{best_case:.2f}")
         m2.metric("Ortalama Tahmin", f"{avg_case:.2f}")
         m3.metric("En Kötü Senaryo (5%)", f"{worst_case:.2f}")
-else:
+
+    elif active_view == VIEW_BACKTEST:
+        st.subheader(f"Geriye Dönük Test ({selected_params['mode']} Kuralları)")
+        st.markdown("AI Analist puanı her barda hesaplanır; puan **giriş eşiğine** ulaşınca alınır, **çıkış eşiğine** inince pozisyon kapatılır. Karar bir sonraki barın getirisine uygulanır.")
+        bt1, bt2, bt3, bt4 = st.columns(4)
+        bt_entry = bt1.select_slider("Giriş Eşiği (Puan ≥)", options=[1, 2, 3], value=DEFAULT_ENTRY)
+        bt_exit = bt2.select_slider("Çıkış Eşiği (Puan ≤)", options=[0, -1, -2, -3], value=DEFAULT_EXIT)
+        bt_cost = bt3.number_input("İşlem Maliyeti (baz puan)", min_value=0.0, max_value=200.0, value=float(DEFAULT_COST_BPS), step=5.0)
+        bt_short = bt4.checkbox("Çıkışta Açığa Sat")
+        with metrics.timer("backtest"):
+            bt_stats, bt_curves = backtest_frame(df, selected_params["mode"], bt_entry, bt_exit, bt_short, bt_cost,
+                                                 PERIODS_PER_YEAR.get(timeframe_code(selected_params), 252))
+        b1, b2, b3, b4, b5 = st.columns(5)
+        b1.metric("Strateji Getirisi", f"{bt_stats['Getiri %']:.1f}%", f"{bt_stats['Getiri %'] - bt_stats['Al-Tut %']:.1f}% Al-Tut'a göre")
+        b2.metric("Maks. Düşüş", f"{bt_stats['Maks. Düşüş %']:.1f}%")
+        b3.metric("İsabet Oranı", f"{bt_stats['İsabet %']:.0f}%" if bt_stats['İşlem'] else "-", f"{bt_stats['İşlem']:.0f} işlem", delta_color="off")
+        b4.metric("Yıllık Devir", f"{bt_stats['Devir (yıllık)']:.1f}x")
+        b5.metric("Sharpe", f"{bt_stats['Sharpe']:.2f}")
+        curve_points = bt_curves.loc[chart_df.index[0]:chart_df.index[-1]]
+        fig_bt = go.Figure()
+        for column, color in (("Strateji", "#00ff00"), ("Al-Tut", "gray")):
+            points = lttb_series(curve_points[column], point_budget)
+            fig_bt.add_trace(go.Scatter(x=points.index, y=points, name=column, line=dict(color=color)))
+        fig_bt.update_layout(template='plotly_dark', title='Özkaynak Eğrisi (başlangıç = 1)', height=400)
+        st.plotly_chart(fig_bt, use_container_width=True)
+elif active_view not in UNIVERSE_VIEWS:
     st.info("Veri yükleniyor veya bu sembol için seçilen periyotta veri yok.")
 
-# --- TAB 4: MARKET SCANNER ---
-with tab4:
+# --- GÜNÜN TRENDLERİ: MARKET SCANNER ---
+if active_view == VIEW_TRENDS:
     st.subheader("🔥 Günün Piyasa Trendleri")
     st.markdown("Bu modül, hisse listesindeki tüm sembolleri tarayarak **son kapanışa göre** en çok kazandıran ve kaybettirenleri listeler.")
     
-    if st.button("🚀 PİYASAYI TARA (Başlat)"):
-        with st.spinner("Piyasa verileri taranıyor... Bu işlem 10-15 saniye sürebilir."):
-            market_df = get_market_trends()
-
-        if not market_df.empty:
-            # 3 Kategoriye Ayır
-            top_gainers = market_df.sort_values(by="Change %", ascending=False).head(10)
-            top_losers = market_df.sort_values(by="Change %", ascending=True).head(10)
-            top_volume = market_df.sort_values(by="Volume", ascending=False).head(10)
-            
-            # Kolonları Formatla
-            def format_df(d):
-                d = d.copy()
-                d['Price'] = d['Price'].map('{:.2f}'.format)
-                d['Change %'] = d['Change %'].map('{:.2f}%'.format)
-                d['Volume'] = d['Volume'].map('{:,.0f}'.format)
-                return d
+    # Alt evren seçimi (sadece BIST, sadece kripto...); liste evrende bir kez üretilir
+    scan_class = st.selectbox("Tarama Evreni", [None] + list(ASSET_CLASSES), key="scan_universe",
+                              format_func=lambda c: "Tümü" if c is None else ASSET_CLASSES[c])
+    scan_symbols = universe.select(asset_class=scan_class)
+    
+    # Kolonları Formatla
+    def format_df(d):
+        d = d.copy()
+        d['Price'] = d['Price'].map('{:.2f}'.format)
+        d['Change %'] = d['Change %'].map('{:.2f}%'.format)
+        d['Volume'] = d['Volume'].map('{:,.0f}'.format)
+        return d
+    
+    def render_market_tables(market_df, placeholders):
+        # 3 Kategoriye Ayır
+        top_gainers = top_n(market_df, "Change %", 10)
+        top_losers = top_n(market_df, "Change %", 10, largest=False)
+        top_volume = top_n(market_df, "Volume", 10)
+        
+        with placeholders[0].container():
+            st.success("🚀 En Çok Yükselenler")
+            st.dataframe(format_df(top_gainers), hide_index=True, use_container_width=True)
             
-            col_gain, col_loss, col_vol = st.columns(3)
+        with placeholders[1].container():
+            st.error("🔻 En Çok Düşenler")
+            st.dataframe(format_df(top_losers), hide_index=True, use_container_width=True)
             
-            with col_gain:
-                st.success("🚀 En Çok Yükselenler")
-                st.dataframe(format_df(top_gainers), hide_index=True, use_container_width=True)
-                
-            with col_loss:
-                st.error("🔻 En Çok Düşenler")
-                st.dataframe(format_df(top_losers), hide_index=True, use_container_width=True)
-                
-            with col_vol:
-                st.info("📊 Hacim Liderleri")
-                st.dataframe(format_df(top_volume), hide_index=True, use_container_width=True)
+        with placeholders[2].container():
+            st.info("📊 Hacim Liderleri")
+            st.dataframe(format_df(top_volume), hide_index=True, use_container_width=True)
+    
+    if st.button("🚀 PİYASAYI TARA (Başlat)"):
+        progress = st.progress(0.0, text="Piyasa verileri taranıyor...")
+        col_gain, col_loss, col_vol = st.columns(3)
+        placeholders = (col_gain.empty(), col_loss.empty(), col_vol.empty())
+        
+        market_df = pd.DataFrame()
+        reports = []
+        n_symbols = len(scan_symbols)
+        # Parçalar geldikçe tablolar güncellenir
+        with metrics.timer("market_scan"):
+            for market_df, reports in iter_market_trends(scan_symbols):
+                done = sum(r["Sembol"] for r in reports)
+                progress.progress(min(done / n_symbols, 1.0), text=f"Taranan sembol: {done}/{n_symbols}")
+                if not market_df.empty:
+                    render_market_tables(market_df, placeholders)
+        progress.empty()
+
+        if market_df.empty:
+            st.warning("Veri alınamadı veya piyasa kapalı olabilir. Lütfen daha sonra tekrar deneyin.")
+        
+        with st.expander("📡 Tarama İstatistikleri"):
+            st.dataframe(summarize_reports(reports), hide_index=True, use_container_width=True)
+            st.dataframe(pd.DataFrame(reports), hide_index=True, use_container_width=True)
+
+    # --- AI SİNYAL TARAMASI ---
+    st.markdown("---")
+    st.subheader(f"🤖 AI Sinyal Taraması ({selected_params['mode']} - {period_selection})")
+    st.markdown("Yapay zeka analistinin puanlama kuralları seçili zaman diliminde, seçili evrendeki **tüm sembollere** uygulanır.")
+    
+    # Arka plan servisi (worker.py) bu zaman dilimini izliyorsa hazır sonuç gösterilir
+    snapshot_df, snapshot_age = load_snapshot(timeframe_code(selected_params), max_age=SNAPSHOT_MAX_AGE)
+    screen_df = None
+    if snapshot_df is not None:
+        snapshot_df = snapshot_df[snapshot_df["Symbol"].isin(scan_symbols)]
+    if snapshot_df is not None and not snapshot_df.empty:
+        st.caption(f"⏱️ Arka plan servisi sonuçları ({snapshot_age:.0f} sn önce güncellendi)")
+        screen_df = snapshot_df
+    elif st.button("🧠 TÜM SEMBOLLERİ PUANLA"):
+        with st.spinner("Tüm semboller indiriliyor ve puanlanıyor..."), metrics.timer("signal_screen"):
+            screen_df = get_signal_screen(selected_params["period"], selected_params["interval"], selected_params.get("resample"), selected_params["mode"], scan_class)
+    
+    if screen_df is not None:
+        if not screen_df.empty:
+            screen_df = screen_df.sort_values(by="Skor", ascending=False)
+            st.dataframe(
+                screen_df,
+                hide_index=True,
+                use_container_width=True,
+                column_config={
+                    "Price": st.column_config.NumberColumn(format="%.2f"),
+                    "RSI": st.column_config.NumberColumn(format="%.1f"),
+                    "MACD": st.column_config.NumberColumn(format="%.4f"),
+                    "Signal": st.column_config.NumberColumn(format="%.4f"),
+                    "SMA20": st.column_config.NumberColumn(format="%.2f"),
+                    "SMA50": st.column_config.NumberColumn(format="%.2f"),
+                },
+            )
         else:
             st.warning("Veri alınamadı veya piyasa kapalı olabilir. Lütfen daha sonra tekrar deneyin.")
+    
+    recent_alerts = read_alerts(limit=20)
+    if recent_alerts:
+        with st.expander(f"🔔 Son Alarmlar ({len(recent_alerts)})"):
+            for alert in recent_alerts:
+                st.write(f"`{alert['timeframe']}` {alert['message']}")
+
+# --- RİSK MATRİSİ: KORELASYON, BETA, VaR ---
+if active_view == VIEW_RISK:
+    st.subheader("🧮 Korelasyon ve Risk Matrisi")
+    st.markdown("Seçili evrendeki sembollerin günlük getirileri ortak takvime hizalanır (kripto hafta sonu hareketi pazartesiye eklenir); kayan korelasyon, benchmark'a göre beta ve **eşit ağırlıklı portföyün** riski hesaplanır.")
+    r1, r2, r3 = st.columns(3)
+    risk_class = r1.selectbox("Risk Evreni", list(ASSET_CLASSES) + [None], key="risk_universe",
+                              format_func=lambda c: "Tümü" if c is None else ASSET_CLASSES[c])
+    risk_benchmark = r2.selectbox("Benchmark", list(BENCHMARKS), format_func=lambda b: f"{BENCHMARKS[b]} ({b})")
+    risk_window = r3.select_slider("Pencere (gün)", options=[20, 60, 120, 250], value=DEFAULT_WINDOW)
+
+    # Tüm evren indirileceği için ilk hesaplama butonla başlar, sonra önbellekten gelir
+    if st.button("📐 RİSK MATRİSİNİ HESAPLA"):
+        st.session_state.risk_requested = True
+
+    if st.session_state.get("risk_requested"):
+        with st.spinner("Evren getirileri indiriliyor ve hizalanıyor..."), metrics.timer("risk"):
+            risk_returns = get_risk_returns(risk_class, risk_benchmark)
+            if risk_returns is not None and risk_benchmark in risk_returns and risk_returns.shape[1] > 2:
+                benchmark_returns = risk_returns[risk_benchmark]
+                risk_returns = risk_returns.drop(columns=risk_benchmark)
+                moments = get_rolling_moments((risk_class, risk_benchmark, RISK_PERIOD, risk_window), risk_window)
+                with moments.lock:
+                    corr = moments.update(risk_returns).correlation()
+                betas = beta(risk_returns, benchmark_returns, risk_window)
+                portfolio = portfolio_returns(risk_returns)
+                risk_stats = value_at_risk(portfolio, VAR_LEVEL)
+                seed = zlib.crc32(repr((risk_class, risk_benchmark, risk_returns.index[-1].isoformat())).encode())
+                risk_sim = simulate_portfolio(risk_returns, value=100.0, horizon=30, n_paths=10000, seed=seed)
+            else:
+                risk_returns = None
+
+        if risk_returns is None:
+            st.warning("Risk matrisi için yeterli veri alınamadı. Lütfen daha sonra tekrar deneyin.")
+        else:
+            upper = corr.to_numpy()[np.triu_indices(len(corr), k=1)]
+            k1, k2, k3, k4, k5 = st.columns(5)
+            k1.metric("Sembol / Gün", f"{risk_returns.shape[1]} / {len(risk_returns)}")
+            k2.metric("Ort. Korelasyon", f"{np.nanmean(upper):.2f}")
+            k3.metric(f"Günlük VaR (%{VAR_LEVEL * 100:g})", f"{risk_stats['VaR %']:.2f}%",
+                      f"Parametrik {risk_stats['Parametrik VaR %']:.2f}%", delta_color="off")
+            k4.metric("Günlük CVaR", f"{risk_stats['CVaR %']:.2f}%",
+                      f"Parametrik {risk_stats['Parametrik CVaR %']:.2f}%", delta_color="off")
+            k5.metric("30 Gün MC VaR (%95)", f"{100 - risk_sim['bands'][5][-1]:.2f}%")
+
+            # En yüksek betalı semboller ısı haritasında
+            shown = betas.sort_values(ascending=False).index[:RISK_HEATMAP_MAX]
+            heat = corr.loc[shown, shown]
+            fig_corr = go.Figure(go.Heatmap(z=heat.to_numpy(), x=list(shown), y=list(shown), zmin=-1, zmax=1, colorscale='RdBu_r'))
+            fig_corr.update_layout(template='plotly_dark', title=f'Korelasyon (son {moments.count()} gün, en yüksek betalı {len(shown)} sembol)', height=700)
+            st.plotly_chart(fig_corr, use_container_width=True)
+
+            vol = risk_returns.iloc[-risk_window:].std() * np.sqrt(PERIODS_PER_YEAR["1d"]) * 100
+            risk_table = pd.DataFrame({
+                "Symbol": betas.index,
+                "Beta": betas.to_numpy(),
+                "Korelasyon": risk_returns.iloc[-risk_window:].corrwith(benchmark_returns.iloc[-risk_window:]).to_numpy(),
+                "Volatilite % (yıllık)": vol.to_numpy(),
+            }).sort_values("Beta", ascending=False)
+            c1, c2 = st.columns(2)
+            with c1:
+                st.markdown(f"**Beta ({BENCHMARKS[risk_benchmark]})**")
+                st.dataframe(risk_table, hide_index=True, use_container_width=True,
+                             column_config={column: st.column_config.NumberColumn(format="%.2f") for column in risk_table.columns[1:]})
+            with c2:
+                st.markdown("**En Yüksek Korelasyonlu Çiftler**")
+                st.dataframe(top_pairs(corr, 15), hide_index=True, use_container_width=True,
+                             column_config={"Korelasyon": st.column_config.NumberColumn(format="%.2f")})
+
+# 6. Performans
+metrics.record("rerun", time.perf_counter() - rerun_started)
+cache_stats = get_fetch_coordinator().kind_stats()
+try:
+    metrics.write_prometheus(cache_stats=cache_stats)
+except OSError:
+    pass
+
+if rerun_profiler is not None:
+    st.session_state.last_profile = rerun_profiler.stop()
+
+if show_perf:
+    with st.sidebar.expander("⏱️ Performans", expanded=True):
+        st.dataframe(metrics.summary(), hide_index=True, use_container_width=True,
+                     column_config={name: st.column_config.NumberColumn(format="%.1f") for name in ("p50 (ms)", "p95 (ms)", "Son (ms)")})
+        lookups = dict(cache_stats)
+        for (name, outcome), value in metrics.counters().items():
+            lookups.setdefault(name, {})[outcome] = value
+        for name, outcomes in sorted(lookups.items()):
+            st.metric(f"Önbellek isabeti: {name}", f"{hit_rate(outcomes) * 100:.0f}%")
+        st.download_button("📥 Prometheus Metrikleri", metrics.prometheus_text(cache_stats), file_name="metrics.prom")
+        if "last_profile" in st.session_state:
+            st.code(st.session_state.last_profile, language=None)
@@ -0,0 +1,276 @@
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# 4. Teknik Analiz Hesaplamaları
+def calculate_rsi(data, window=14):
+    delta = data['Close'].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=window).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=window).mean()
+    rs = gain / loss
+    return 100 - (100 / (1 + rs))
+
+def calculate_macd(data, slow=26, fast=12, signal=9):
+    exp1 = data['Close'].ewm(span=fast, adjust=False).mean()
+    exp2 = data['Close'].ewm(span=slow, adjust=False).mean()
+    macd = exp1 - exp2
+    signal_line = macd.ewm(span=signal, adjust=False).mean()
+    return macd, signal_line
+
+def calculate_bollinger(data, window=20, no_of_std=2):
+    rolling_mean = data['Close'].rolling(window).mean()
+    rolling_std = data['Close'].rolling(window).std()
+    upper_band = rolling_mean + (rolling_std * no_of_std)
+    lower_band = rolling_mean - (rolling_std * no_of_std)
+    return upper_band, rolling_mean, lower_band
+
+def calculate_cci(data, ndays=20):
+    tp = (data['High'] + data['Low'] + data['Close']) / 3
+    cci = (tp - tp.rolling(ndays).mean()) / (0.015 * tp.rolling(ndays).std())
+    return cci
+
+def add_indicators(df):
+    df['RSI'] = calculate_rsi(df)
+    df['MACD'], df['Signal'] = calculate_macd(df)
+    df['BB_Upper'], df['BB_Middle'], df['BB_Lower'] = calculate_bollinger(df)
+    df['CCI'] = calculate_cci(df)
+    df['SMA20'] = df['Close'].rolling(window=20).mean()
+    df['SMA50'] = df['Close'].rolling(window=50).mean()
+    return df
+
+
+INDICATOR_COLUMNS = ['RSI', 'MACD', 'Signal', 'BB_Upper', 'BB_Middle', 'BB_Lower', 'CCI', 'SMA20', 'SMA50']
+
+# Durum dizilerinde tutulan ara seriler (EWM akümülatörleri ve tipik fiyat).
+# Durum float64 tutulur (özyinelemeli EWM hassasiyeti); çıktılar float32.
+_STATE_COLUMNS = ['Close', 'High', 'Low', 'TP', 'Gain', 'Loss', 'EMA_Fast', 'EMA_Slow', 'EMA_Signal']
+OUTPUT_DTYPE = np.float32
+
+
+def _window_mean_std(values, start, window):
+    # values[start-window+1 : ] üzerindeki kayan pencerelerin ortalaması ve std'si (ddof=1)
+    lo = start - window + 1
+    out_mean = np.full(len(values) - start, np.nan)
+    out_std = np.full(len(values) - start, np.nan)
+    if lo < 0:
+        skip = -lo
+        lo = 0
+    else:
+        skip = 0
+    if len(values) - lo < window:
+        return out_mean, out_std
+    windows = sliding_window_view(values[lo:], window)
+    out_mean[skip:] = windows.mean(axis=1)
+    out_std[skip:] = windows.std(axis=1, ddof=1)
+    return out_mean, out_std
+
+
+def _price_columns(df, start, stop):
+    # [start, stop) aralığındaki Close/High/Low (float64)
+    return tuple(df[name].iloc[start:stop].to_numpy(dtype=float) for name in ('Close', 'High', 'Low'))
+
+
+class IndicatorEngine:
+    # Sona eklenen / revize edilen barlar için indikatörleri sadece kuyrukta günceller.
+    # İlk yüklemede pandas fonksiyonlarıyla birebir aynı sonucu üretir; sonraki
+    # güncellemelerde maliyet yeni bar sayısıyla orantılıdır.
+    def __init__(self, rsi_window=14, fast=12, slow=26, signal=9,
+                 bb_window=20, no_of_std=2, cci_window=20, sma_windows=(20, 50),
+                 check_bars=5):
+        self.rsi_window = rsi_window
+        self.fast = fast
+        self.slow = slow
+        self.signal = signal
+        self.bb_window = bb_window
+        self.no_of_std = no_of_std
+        self.cci_window = cci_window
+        self.sma_windows = sma_windows
+        # Revizyon kontrolü için geriye bakılan bar sayısı; daha eski barların revizyonu
+        # update'e verilen revision (BarStore sayacı) değişince anlaşılır
+        self.check_bars = check_bars
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._index = None
+        self._n = 0
+        self._revision = None
+        self._arrays = {}
+        # Döndürülen çerçevelerin gördüğü bar sayısı (çıktı dizilerinin [:_published] aralığı)
+        self._published = 0
+        # Yedek çıktı dizileri ve güncel dizilerle eşit oldukları bar sayısı
+        self._spare = None
+        self._spare_synced = 0
+
+    @staticmethod
+    def _in_use(arrays):
+        # Döndürülen çerçevelerdeki görünümler dizinin kendisine (base) referans tutar;
+        # sözlük ve çağrı argümanı dışında referans varsa dizi hâlâ görülüyor demektir
+        return any(sys.getrefcount(arrays[name]) > 2 for name in INDICATOR_COLUMNS)
+
+    def _detach(self, keep):
+        # Çıktı dizilerinin [keep:] aralığı yeniden yazılacak. Döndürülen çerçeveler (başka
+        # oturumlarda hâlâ çiziliyor olabilir) bu dizileri görüyorsa yazım yedek dizilere
+        # yapılır: yedeğe yalnız son eşitlendiği yerden keep'e kadarki barlar kopyalanır
+        # (canlı modda son bar revizyonu O(1)); eski diziler yedek olur.
+        self._published = 0
+        if not self._in_use(self._arrays):
+            return
+        spare = self._spare
+        capacity = len(self._arrays['RSI'])
+        if spare is None or len(spare['RSI']) != capacity or self._in_use(spare):
+            # Yedek de görülüyorsa (ör. iki eski çerçeve yaşıyor) yeni diziler ayrılır
+            spare = {name: np.full(capacity, np.nan, dtype=OUTPUT_DTYPE) for name in INDICATOR_COLUMNS}
+            self._spare_synced = 0
+        start = min(self._spare_synced, keep)
+        for name in INDICATOR_COLUMNS:
+            spare[name][start:keep] = self._arrays[name][start:keep]
+        self._spare = {name: self._arrays[name] for name in INDICATOR_COLUMNS}
+        self._spare_synced = keep
+        self._arrays.update(spare)
+
+    def _reserve(self, n):
+        capacity = len(self._arrays['Close']) if self._arrays else 0
+        if n <= capacity:
+            return
+        capacity = max(n, capacity * 2, 256)
+        self._spare = None
+        for name in _STATE_COLUMNS + INDICATOR_COLUMNS:
+            grown = np.full(capacity, np.nan, dtype=float if name in _STATE_COLUMNS else OUTPUT_DTYPE)
+            if name in self._arrays:
+                grown[:self._n] = self._arrays[name][:self._n]
+            self._arrays[name] = grown
+
+    def _first_changed(self, df):
+        # Değişen ilk bar; 0 ise tam hesaplama gerekir. Yalnız son check_bars bar okunur.
+        n_old = self._n
+        if n_old == 0 or len(df) == 0 or df.index[0] != self._index[0]:
+            return 0
+        start = max(1, min(n_old, len(df)) - self.check_bars)
+        if df.index[start - 1] != self._index[start - 1]:
+            return 0
+        k = min(n_old, len(df))
+        close, high, low = _price_columns(df, start, k)
+        a = self._arrays
+        same = (
+            (df.index[start:k] == self._index[start:k])
+            & (close == a['Close'][start:k])
+            & (high == a['High'][start:k])
+            & (low == a['Low'][start:k])
+        )
+        changed = np.flatnonzero(~same)
+        return start + changed[0] if len(changed) else k
+
+    def _full(self, df, close, high, low):
+        n = len(df)
+        self._n = 0
+        self._reserve(n)
+        if self._published:
+            self._detach(0)
+        self._spare_synced = 0
+        a = self._arrays
+        a['Close'][:n] = close
+        a['High'][:n] = high
+        a['Low'][:n] = low
+        a['TP'][:n] = (high + low + close) / 3
+        # Kompakt (float32) barlar da float64 üzerinden hesaplanır; kuyruk güncellemesiyle aynı sonuç
+        data = pd.DataFrame({'Close': close, 'High': high, 'Low': low}, index=df.index)
+        delta = data['Close'].diff()
+        a['Gain'][:n] = delta.where(delta > 0, 0).to_numpy(dtype=float)
+        a['Loss'][:n] = (-delta.where(delta < 0, 0)).to_numpy(dtype=float)
+        a['EMA_Fast'][:n] = data['Close'].ewm(span=self.fast, adjust=False).mean().to_numpy(dtype=float)
+        a['EMA_Slow'][:n] = data['Close'].ewm(span=self.slow, adjust=False).mean().to_numpy(dtype=float)
+
+        a['RSI'][:n] = calculate_rsi(data, self.rsi_window).to_numpy(dtype=float)
+        macd, signal_line = calculate_macd(data, self.slow, self.fast, self.signal)
+        a['MACD'][:n] = macd.to_numpy(dtype=float)
+        a['EMA_Signal'][:n] = signal_line.to_numpy(dtype=float)
+        a['Signal'][:n] = a['EMA_Signal'][:n]
+        upper, middle, lower = calculate_bollinger(data, self.bb_window, self.no_of_std)
+        a['BB_Upper'][:n] = upper.to_numpy(dtype=float)
+        a['BB_Middle'][:n] = middle.to_numpy(dtype=float)
+        a['BB_Lower'][:n] = lower.to_numpy(dtype=float)
+        a['CCI'][:n] = calculate_cci(data, self.cci_window).to_numpy(dtype=float)
+        for w in self.sma_windows:
+            a[f'SMA{w}'][:n] = data['Close'].rolling(window=w).mean().to_numpy(dtype=float)
+        self._n = n
+
+    def _tail(self, p, n, close, high, low):
+        # close/high/low: yalnız p'den itibaren yeni/revize barlar
+        self._reserve(n)
+        if p < self._published:
+            self._detach(p)
+        self._spare_synced = min(self._spare_synced, p)
+        a = self._arrays
+        a['Close'][p:n] = close
+        a['High'][p:n] = high
+        a['Low'][p:n] = low
+        a['TP'][p:n] = (high + low + close) / 3
+        delta = close - a['Close'][p - 1:n - 1]
+        a['Gain'][p:n] = np.where(delta > 0, delta, 0.0)
+        a['Loss'][p:n] = np.where(delta < 0, -delta, 0.0)
+
+        # EWM akümülatörleri: önceki barın durumundan devam (adjust=False)
+        alpha_fast = 2 / (self.fast + 1)
+        alpha_slow = 2 / (self.slow + 1)
+        alpha_signal = 2 / (self.signal + 1)
+        ema_fast, ema_slow = a['EMA_Fast'][p - 1], a['EMA_Slow'][p - 1]
+        signal_line = a['EMA_Signal'][p - 1]
+        for i in range(p, n):
+            c = a['Close'][i]
+            ema_fast = (1 - alpha_fast) * ema_fast + alpha_fast * c
+            ema_slow = (1 - alpha_slow) * ema_slow + alpha_slow * c
+            macd = ema_fast - ema_slow
+            signal_line = (1 - alpha_signal) * signal_line + alpha_signal * macd
+            a['EMA_Fast'][i] = ema_fast
+            a['EMA_Slow'][i] = ema_slow
+            a['MACD'][i] = macd
+            a['EMA_Signal'][i] = signal_line
+        a['Signal'][p:n] = a['EMA_Signal'][p:n]
+
+        # Kayan pencereler: sadece yeni barları kapsayan pencereler hesaplanır
+        gain, _ = _window_mean_std(a['Gain'][:n], p, self.rsi_window)
+        loss, _ = _window_mean_std(a['Loss'][:n], p, self.rsi_window)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            a['RSI'][p:n] = 100 - (100 / (1 + gain / loss))
+
+        mean, std = _window_mean_std(a['Close'][:n], p, self.bb_window)
+        a['BB_Middle'][p:n] = mean
+        a['BB_Upper'][p:n] = mean + std * self.no_of_std
+        a['BB_Lower'][p:n] = mean - std * self.no_of_std
+
+        tp_mean, tp_std = _window_mean_std(a['TP'][:n], p, self.cci_window)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            a['CCI'][p:n] = (a['TP'][p:n] - tp_mean) / (0.015 * tp_std)
+
+        for w in self.sma_windows:
+            a[f'SMA{w}'][p:n], _ = _window_mean_std(a['Close'][:n], p, w)
+        self._n = n
+
+    def update(self, df, revision=None):
+        # revision: kaynağın geçmiş revizyon sayacı (BarStore); değiştiyse son check_bars
+        # bardan önce de değişiklik olabilir, tam hesaplamaya dönülür
+        p = self._first_changed(df) if revision == self._revision else 0
+        if p:
+            # Kuyrukta yalnız yeni/revize barlar float64'e çevrilir
+            close, high, low = _price_columns(df, p, len(df))
+            # Eksik veri EWM durumunu pandas'tan farklı ilerletir, tam hesaplamaya dön
+            if np.isnan(close).any():
+                p = 0
+            elif p < len(df) or len(df) != self._n:
+                self._tail(p, len(df), close, high, low)
+        if p == 0:
+            self._full(df, *_price_columns(df, 0, len(df)))
+        self._index = df.index
+        self._revision = revision
+
+        # Kopya yok: bar kolonları ve önceden ayrılmış indikatör dizileri görünüm olarak
+        # birleştirilir. Sonraki update yalnız bu aralığın ötesine yerinde yazar; revizyonda
+        # bu çerçeve hâlâ yaşıyorsa yazım yedek dizilere yapılır (_detach), çerçeve değişmez.
+        indicators = pd.DataFrame({name: self._arrays[name][:self._n] for name in INDICATOR_COLUMNS},
+                                  index=df.index, copy=False)
+        self._published = self._n
+        return pd.concat([df.drop(columns=INDICATOR_COLUMNS, errors='ignore'), indicators], axis=1)
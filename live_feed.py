@@ -0,0 +1,364 @@
+import argparse
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque, namedtuple
+
+import numpy as np
+import pandas as pd
+
+from data_store import INTERVAL_STEPS, merge_bars
+from providers import YFinanceProvider, session_mask
+from resample import session_anchor
+
+# Canlı mod için akış hattı: arka plandaki asyncio döngüsü izlenen sembollerin son
+# fiyatlarını birkaç saniyede bir çeker, (sembol, bar kodu) başına oluşmakta olan barı
+# bellekte tutar ve fiyatları OHLCV barlarına katlar. Uygulama her yenilemede geçmiş
+# barların üzerine bu canlı barları ekler; tam geçmiş yeniden indirilmez.
+logger = logging.getLogger("finans.live")
+
+LIVE_POLL_SECONDS = float(os.environ.get("FINANS_LIVE_POLL", 5))
+# Bu süre boyunca hiçbir oturumun istemediği abonelikler bırakılır
+LIVE_IDLE_SECONDS = 300
+# (sembol, bar kodu) başına bellekte tutulan kapanmış canlı bar sayısı
+LIVE_MAX_BARS = 500
+
+# time: fiyatın piyasadaki zamanı (UTC); volume: günlük kümülatif hacim (bilinmiyorsa None)
+Quote = namedtuple("Quote", ["symbol", "time", "price", "volume"])
+
+
+def bar_step(code):
+    # "5m", "60m", "1d" gibi indirme kodları ve "4h", "30min" gibi yerel zaman dilimleri (pandas kuralı)
+    return INTERVAL_STEPS.get(code) or pd.Timedelta(code)
+
+
+def bucket_start(ts, step, ticker):
+    # Barın başlangıcı; resample_ohlcv ile aynı seans hizalaması (BIST 10:00'dan itibaren)
+    tz, offset = session_anchor(ticker)
+    local = ts.tz_convert(tz)
+    if step >= pd.Timedelta(days=1):
+        return local.normalize().tz_convert("UTC")
+    origin = local.normalize() + pd.Timedelta(offset)
+    if local < origin:
+        origin -= pd.Timedelta(days=1)
+    return (origin + ((local - origin) // step) * step).tz_convert("UTC")
+
+
+def in_session(quote):
+    # Seans dışındaki (gece, hafta sonu) fiyatlar bar açmamalı; seans bilgisi evrenden gelir
+    return bool(session_mask(pd.DatetimeIndex([quote.time]), quote.symbol, "1m")[0])
+
+
+def merge_live(history, live):
+    # Kapanmış dönemlerde indirilen barlar geçerlidir; akıştan yalnız geçmişte henüz olmayan
+    # barlar alınır. Geçmişin son barı (oluşmakta olan bar) akışla birleştirilir.
+    if history.empty:
+        return live
+    last = history.index[-1]
+    live = live[live.index >= last]
+    if live.empty:
+        return history
+    if live.index[0] == last:
+        live = live.copy()
+        stored = history.iloc[-1]
+        live.iloc[0, live.columns.get_loc('Open')] = stored['Open']
+        live.iloc[0, live.columns.get_loc('High')] = max(stored['High'], live['High'].iloc[0])
+        live.iloc[0, live.columns.get_loc('Low')] = min(stored['Low'], live['Low'].iloc[0])
+        live.iloc[0, live.columns.get_loc('Volume')] = max(stored['Volume'], live['Volume'].iloc[0])
+    return merge_bars(history, live)
+
+
+def align_index(frame, index, ticker):
+    # Canlı barları (UTC) geçmiş barların saat dilimine uydur; saat dilimsiz geçmiş
+    # borsanın yerel saatiyle tutulur
+    tz = getattr(index, "tz", None)
+    if tz is not None:
+        return frame.tz_convert(tz)
+    return frame.tz_convert(session_anchor(ticker)[0]).tz_localize(None)
+
+
+class QuoteSource:
+    name = "base"
+
+    async def fetch_quotes(self, symbols):
+        raise NotImplementedError
+
+    def anchor(self, symbol, price):
+        # Sentetik kaynaklar başlangıç fiyatını geçmiş veriden alır
+        pass
+
+
+def _symbol_bars(batch, symbol):
+    # Toplu istekte (sembol, alan) kolonları; tek sembolde yfinance düz kolon da dönebilir
+    if isinstance(batch.columns, pd.MultiIndex):
+        if symbol not in batch.columns.get_level_values(0):
+            return None
+        return batch[symbol]
+    return batch
+
+
+class YFinanceQuoteSource(QuoteSource):
+    name = "yfinance"
+
+    def __init__(self, provider=None, timeout=10):
+        # Tüm abonelikler tek toplu istekle çekilir; sembol başına ayrı istek açılmaz
+        self.provider = provider or YFinanceProvider()
+        self.timeout = timeout
+
+    def _quotes(self, symbols):
+        # Günün 1 dakikalık barları (yfinance'in en kısa dönemi): fast_info'nun aksine 1 yıllık
+        # geçmiş indirmez. Zaman, son dakika barının piyasa zamanıdır; piyasa kapalıyken ilerlemez.
+        batch = self.provider.fetch_batch(symbols, "1d", timeout=self.timeout, interval="1m")
+        quotes = []
+        for symbol in symbols:
+            bars = _symbol_bars(batch, symbol)
+            if bars is None or 'Close' not in bars:
+                continue
+            bars = bars.dropna(subset=['Close'])
+            if bars.empty:
+                continue
+            stamp = bars.index[-1]
+            stamp = stamp.tz_convert("UTC") if stamp.tz is not None else stamp.tz_localize("UTC")
+            volume = float(bars['Volume'].sum()) if 'Volume' in bars else None
+            quotes.append(Quote(symbol, stamp, float(bars['Close'].iloc[-1]), volume))
+        return quotes
+
+    async def fetch_quotes(self, symbols):
+        return await asyncio.to_thread(self._quotes, symbols)
+
+
+class SimulatedQuoteSource(QuoteSource):
+    # Yerel test beslemesi: sembol başına rastgele yürüyüş, her çağrıda bir fiyat (zaman: şimdi)
+    name = "simulated"
+
+    def __init__(self, volatility=0.0005, seed=None, default_price=100.0):
+        self.volatility = volatility
+        self.default_price = default_price
+        self.rng = np.random.default_rng(seed)
+        self.prices = {}
+        self.volumes = {}
+
+    def anchor(self, symbol, price):
+        if np.isfinite(price):
+            self.prices.setdefault(symbol, float(price))
+
+    async def fetch_quotes(self, symbols):
+        now = pd.Timestamp.now(tz="UTC")
+        steps = np.exp(self.rng.normal(0, self.volatility, len(symbols)))
+        trades = self.rng.integers(0, 1000, len(symbols))
+        quotes = []
+        for symbol, step, traded in zip(symbols, steps, trades):
+            price = self.prices.get(symbol, self.default_price) * float(step)
+            self.prices[symbol] = price
+            self.volumes[symbol] = self.volumes.get(symbol, 0) + int(traded)
+            quotes.append(Quote(symbol, now, price, self.volumes[symbol]))
+        return quotes
+
+
+class BarAggregator:
+    # Tek (sembol, bar kodu) için oluşmakta olan bar ve son kapanmış barlar
+    def __init__(self, symbol, code, max_bars=LIVE_MAX_BARS):
+        self.symbol = symbol
+        self.code = code
+        self.step = bar_step(code)
+        self.closed = deque(maxlen=max_bars)
+        self.current = None
+        self._last_volume = None
+
+    def seed(self, history):
+        # Geçmişin son barı (çoğunlukla henüz kapanmamış bar) oluşan bar olarak devralınır
+        if history is None or history.empty:
+            return
+        start = history.index[-1]
+        start = start.tz_convert("UTC") if start.tz is not None else start.tz_localize(session_anchor(self.symbol)[0]).tz_convert("UTC")
+        last = history.iloc[-1]
+        self.current = [start, float(last['Open']), float(last['High']), float(last['Low']),
+                        float(last['Close']), float(last.get('Volume', 0) or 0)]
+
+    def _volume_delta(self, volume):
+        # Kümülatif günlük hacimden bu fiyata düşen pay; gün dönümünde sayaç sıfırlanır
+        if volume is None or not np.isfinite(volume):
+            return 0.0
+        previous, self._last_volume = self._last_volume, float(volume)
+        if previous is None:
+            return 0.0
+        return self._last_volume - previous if self._last_volume >= previous else self._last_volume
+
+    def add(self, quote):
+        # Kapanan bar varsa onu döner
+        delta = self._volume_delta(quote.volume)
+        start = bucket_start(quote.time, self.step, self.symbol)
+        price = quote.price
+        current = self.current
+        if current is None or start > current[0]:
+            closed = None
+            if current is not None:
+                closed = tuple(current)
+                self.closed.append(closed)
+            self.current = [start, price, price, price, price, delta]
+            return closed
+        if start == current[0]:
+            current[2] = max(current[2], price)
+            current[3] = min(current[3], price)
+            current[4] = price
+            current[5] += delta
+        # Geç gelen (önceki bara ait) fiyatlar yok sayılır
+        return None
+
+    def frame(self):
+        rows = list(self.closed)
+        if self.current is not None:
+            rows.append(tuple(self.current))
+        if not rows:
+            return None
+        index = pd.DatetimeIndex([row[0] for row in rows], name='Date')
+        return pd.DataFrame([row[1:] for row in rows], index=index,
+                            columns=['Open', 'High', 'Low', 'Close', 'Volume'])
+
+
+class LiveFeed:
+    def __init__(self, source, poll_seconds=LIVE_POLL_SECONDS, idle_seconds=LIVE_IDLE_SECONDS):
+        self.source = source
+        self.poll_seconds = poll_seconds
+        self.idle_seconds = idle_seconds
+        self._aggregators = {}
+        self._touched = {}
+        self._versions = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {"polls": 0, "quotes": 0, "off_session": 0, "errors": 0, "last_poll": None, "poll_seconds": None}
+
+    def subscribe(self, symbol, code, history=None):
+        key = (symbol, code)
+        with self._lock:
+            if key not in self._aggregators:
+                aggregator = BarAggregator(symbol, code)
+                aggregator.seed(history)
+                if aggregator.current is not None:
+                    self.source.anchor(symbol, aggregator.current[4])
+                self._aggregators[key] = aggregator
+                self._versions[key] = 0
+            self._touched[key] = time.monotonic()
+        self.start()
+
+    def add_listener(self, listener):
+        # listener(sembol, bar kodu, bar (tuple), kapandı mı); arka plan iş parçacığından çağrılır
+        self._listeners.append(listener)
+
+    def bars(self, symbol, code):
+        with self._lock:
+            aggregator = self._aggregators.get((symbol, code))
+            return None if aggregator is None else aggregator.frame()
+
+    def version(self, symbol, code):
+        # Abone olunmamış (veya boşta kalıp bırakılmış) bar için None
+        with self._lock:
+            return self._versions.get((symbol, code))
+
+    def subscriptions(self):
+        with self._lock:
+            return list(self._aggregators)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="live-feed", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        asyncio.run(self._poll_loop())
+
+    async def _poll_loop(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self._drop_idle()
+            symbols = sorted({symbol for symbol, _ in self.subscriptions()})
+            if symbols:
+                try:
+                    quotes = await self.source.fetch_quotes(symbols)
+                except Exception:
+                    logger.exception("Canlı fiyatlar alınamadı")
+                    self.stats["errors"] += 1
+                    quotes = []
+                live = [quote for quote in quotes if in_session(quote)]
+                self.stats["off_session"] += len(quotes) - len(live)
+                self._fold(live)
+                self.stats["polls"] += 1
+                self.stats["quotes"] += len(quotes)
+                self.stats["last_poll"] = time.time()
+                self.stats["poll_seconds"] = time.monotonic() - started
+            await asyncio.sleep(max(0.0, self.poll_seconds - (time.monotonic() - started)))
+
+    def _drop_idle(self):
+        now = time.monotonic()
+        with self._lock:
+            for key in [key for key, touched in self._touched.items() if now - touched > self.idle_seconds]:
+                del self._aggregators[key], self._touched[key], self._versions[key]
+
+    def _fold(self, quotes):
+        events = []
+        with self._lock:
+            by_symbol = {}
+            for key in self._aggregators:
+                by_symbol.setdefault(key[0], []).append(key)
+            for quote in quotes:
+                for key in by_symbol.get(quote.symbol, []):
+                    aggregator = self._aggregators[key]
+                    closed = aggregator.add(quote)
+                    self._versions[key] += 1
+                    if closed is not None:
+                        events.append((key[0], key[1], closed, True))
+                    events.append((key[0], key[1], tuple(aggregator.current), False))
+        for event in events:
+            for listener in self._listeners:
+                try:
+                    listener(*event)
+                except Exception:
+                    logger.exception("Canlı bar dinleyicisi başarısız")
+
+
+def get_quote_source(name=None):
+    # FINANS_LIVE_SOURCE=simulated ile ağsız test beslemesi (replay sağlayıcıda varsayılan)
+    default = "simulated" if os.environ.get("FINANS_PROVIDER") == "replay" else "yfinance"
+    name = name or os.environ.get("FINANS_LIVE_SOURCE", default)
+    if name == "simulated":
+        return SimulatedQuoteSource()
+    if name == "yfinance":
+        return YFinanceQuoteSource()
+    raise ValueError(f"Bilinmeyen fiyat kaynağı: {name}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Canlı bar akışını konsolda izle")
+    parser.add_argument("symbols", nargs="+")
+    parser.add_argument("--interval", default="1m", help="Bar kodu (ör. 1m, 5m, 15m, 4h)")
+    parser.add_argument("--source", choices=["simulated", "yfinance"])
+    parser.add_argument("--poll", type=float, default=LIVE_POLL_SECONDS)
+    parser.add_argument("--duration", type=float, default=60, help="İzleme süresi (sn)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    feed = LiveFeed(get_quote_source(args.source), poll_seconds=args.poll)
+
+    def show(symbol, code, bar, closed):
+        state = "KAPANDI" if closed else "güncel"
+        print(f"{symbol} {code} {bar[0]:%H:%M} {state}: O={bar[1]:.4f} H={bar[2]:.4f} L={bar[3]:.4f} "
+              f"C={bar[4]:.4f} V={bar[5]:.0f}")
+
+    feed.add_listener(show)
+    for symbol in args.symbols:
+        feed.subscribe(symbol.upper(), args.interval)
+    time.sleep(args.duration)
+    feed.stop()
+
+
+if __name__ == "__main__":
+    main()
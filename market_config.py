@@ -0,0 +1,29 @@
+import json
+import os
+
+# Uygulama, tarama servisi ve arka plan işçisi tarafından paylaşılan piyasa ayarları.
+# Sembol listesi ve sembol bilgileri universe.py / universe.csv içindedir.
+
+# Analiz periyotları intervals.json'dan okunur (etiket -> ayar, seçim sırası korunur):
+# "interval" indirilen temel bar, "resample" varsa yerelde üretilen zaman dilimi
+# (pandas kuralı: "4h", "30min"; "30m" pandas 3 ile geçersiz),
+# "fetch_period" ilk indirmede istenecek (daha uzun) periyot
+INTERVALS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intervals.json")
+
+with open(INTERVALS_PATH, "r", encoding="utf-8") as f:
+    INTERVALS = json.load(f)
+
+# worker.py döngü aralığı (sn); uygulama depodaki veriye ne kadar güveneceğini buradan türetir
+WORKER_EVERY = float(os.environ.get("FINANS_WORKER_EVERY", 60))
+
+
+def timeframe_code(params):
+    # Kısa zaman dilimi kodu (ör. "4h", "15m", "1d"); komut satırı ve dosya adları için
+    return params.get("resample") or params["interval"]
+
+
+def find_timeframe(code):
+    for label, params in INTERVALS.items():
+        if timeframe_code(params) == code or label == code:
+            return label, params
+    raise KeyError(code)
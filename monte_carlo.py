@@ -0,0 +1,90 @@
+import numpy as np
+
+# Grafikte çizilen yüzdelik bantlar
+BAND_QUANTILES = (5, 25, 50, 75, 95)
+
+
+def _draw_returns(rng, returns, n, horizon, method, bootstrap):
+    # "geometric": log getiriler toplanır; "arithmetic": basit getiriler bileşik çarpılır
+    if method == "geometric":
+        base = np.log1p(returns)
+    else:
+        base = returns
+    if bootstrap:
+        return rng.choice(base, size=(n, horizon))
+    return rng.normal(0, base.std(ddof=1), size=(n, horizon))
+
+
+def _paths(last_price, steps, method):
+    if method == "geometric":
+        growth = np.exp(np.cumsum(steps, axis=1))
+    else:
+        growth = np.cumprod(1 + steps, axis=1)
+    paths = np.empty((steps.shape[0], steps.shape[1] + 1))
+    paths[:, 0] = last_price
+    paths[:, 1:] = last_price * growth
+    return paths
+
+
+def _histogram_quantiles(counts, lo, width, total, quantiles):
+    # Adım başına histogramdan (adım x kutu) doğrusal enterpolasyonla yüzdelik
+    cdf = np.cumsum(counts, axis=1)
+    out = {}
+    for q in quantiles:
+        target = total * q / 100
+        idx = np.minimum((cdf < target).sum(axis=1), counts.shape[1] - 1)
+        rows = np.arange(counts.shape[0])
+        below = np.where(idx > 0, cdf[rows, idx - 1], 0)
+        inside = counts[rows, idx]
+        frac = np.where(inside > 0, (target - below) / np.maximum(inside, 1), 0.5)
+        out[q] = lo + (idx + np.clip(frac, 0, 1)) * width
+    return out
+
+
+def simulate(last_price, returns, horizon=30, n_paths=10000, method="arithmetic",
+             bootstrap=False, seed=None, chunk_size=20000, n_samples=20, n_bins=2048):
+    # Tüm yollar parça parça tek seferde çekilir; bellek chunk_size x horizon ile sınırlı.
+    # Tek parçaya sığan simülasyonlarda yüzdelikler kesin, aksi halde adım başına
+    # histogramlardan (n_bins kutu) hesaplanır.
+    returns = np.asarray(returns, dtype=float)
+    returns = returns[~np.isnan(returns)]
+    rng = np.random.default_rng(seed)
+    n_paths = int(n_paths)
+    chunk_size = max(1, min(int(chunk_size), n_paths))
+
+    total = 0
+    path_sum = np.zeros(horizon + 1)
+    samples = None
+    counts = lo = width = None
+    exact = None
+
+    while total < n_paths:
+        n = min(chunk_size, n_paths - total)
+        paths = _paths(last_price, _draw_returns(rng, returns, n, horizon, method, bootstrap), method)
+        if samples is None:
+            samples = paths[:n_samples].copy()
+        path_sum += paths.sum(axis=0)
+        total += n
+
+        if n == n_paths:
+            exact = {q: np.percentile(paths, q, axis=0) for q in BAND_QUANTILES}
+            break
+        if counts is None:
+            # Kutu aralıkları ilk parçanın yayılımından, her iki yöne payla
+            p_min, p_max = paths.min(axis=0), paths.max(axis=0)
+            spread = np.maximum(p_max - p_min, 1e-12)
+            lo = p_min - spread * 0.5
+            width = spread * 2 / n_bins
+            counts = np.zeros((horizon + 1, n_bins), dtype=np.int64)
+        bins = np.clip(((paths - lo) / width).astype(np.int64), 0, n_bins - 1)
+        flat = (np.arange(horizon + 1) * n_bins + bins).ravel()
+        counts += np.bincount(flat, minlength=(horizon + 1) * n_bins).reshape(horizon + 1, n_bins)
+
+    bands = exact if exact is not None else _histogram_quantiles(counts, lo, width, total, BAND_QUANTILES)
+    return {
+        "steps": np.arange(horizon + 1),
+        "bands": bands,
+        "mean": path_sum / total,
+        "samples": samples,
+        "n_paths": total,
+    }
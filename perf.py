@@ -0,0 +1,145 @@
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from data_store import CACHE_DIR
+
+# Her yeniden çalıştırmanın aşama süreleri (veri, indikatörler, grafikler, tarama...)
+# süreç içinde kayan pencerede tutulur; p50/p95 panelde gösterilir ve
+# Prometheus metin biçiminde dosyaya yazılır (node_exporter textfile collector).
+STAGE_WINDOW = 500
+STAGE_QUANTILES = (50, 95)
+METRICS_PATH = os.environ.get("FINANS_METRICS_PATH", os.path.join(CACHE_DIR, "metrics.prom"))
+
+
+class StageMetrics:
+    def __init__(self, window=STAGE_WINDOW):
+        self.window = window
+        self._samples = {}
+        self._totals = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def record(self, stage, seconds):
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.window)
+            samples.append(seconds)
+            count, total = self._totals.get(stage, (0, 0.0))
+            self._totals[stage] = (count + 1, total + seconds)
+
+    def count(self, name, outcome, n=1):
+        # Önbellek dışı sayaçlar (ör. piyasa taraması isabet/ıska)
+        with self._lock:
+            key = (name, outcome)
+            self._counters[key] = self._counters.get(key, 0) + n
+
+    def counters(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def quantiles(self):
+        # aşama -> (adet, {q: sn}, son ölçüm sn)
+        with self._lock:
+            snapshot = {stage: np.array(samples) for stage, samples in self._samples.items()}
+            totals = dict(self._totals)
+        return {
+            stage: (totals[stage][0], dict(zip(STAGE_QUANTILES, np.percentile(values, STAGE_QUANTILES))), values[-1])
+            for stage, values in snapshot.items()
+        }
+
+    def summary(self):
+        rows = [
+            {"Aşama": stage, "Adet": count, "p50 (ms)": q[50] * 1000, "p95 (ms)": q[95] * 1000, "Son (ms)": last * 1000}
+            for stage, (count, q, last) in self.quantiles().items()
+        ]
+        return pd.DataFrame(rows, columns=["Aşama", "Adet", "p50 (ms)", "p95 (ms)", "Son (ms)"])
+
+    def prometheus_text(self, cache_stats=None):
+        # cache_stats: {önbellek adı: {sonuç: adet}} (FetchCoordinator.kind_stats gibi)
+        lines = [
+            "# HELP finans_stage_seconds Yeniden çalıştırma aşama süreleri (kayan pencere)",
+            "# TYPE finans_stage_seconds summary",
+        ]
+        with self._lock:
+            totals = dict(self._totals)
+        for stage, (_, q, _) in sorted(self.quantiles().items()):
+            for quantile, value in q.items():
+                lines.append(f'finans_stage_seconds{{stage="{stage}",quantile="{quantile / 100:g}"}} {value:.6f}')
+            count, total = totals[stage]
+            lines.append(f'finans_stage_seconds_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'finans_stage_seconds_count{{stage="{stage}"}} {count}')
+
+        lookups = {}
+        for (name, outcome), value in self.counters().items():
+            lookups.setdefault(name, {})[outcome] = value
+        for name, outcomes in (cache_stats or {}).items():
+            lookups.setdefault(name, {}).update(outcomes)
+        lines.append("# HELP finans_cache_lookups_total Önbellek aramaları (sonuca göre)")
+        lines.append("# TYPE finans_cache_lookups_total counter")
+        for name, outcomes in sorted(lookups.items()):
+            for outcome, value in sorted(outcomes.items()):
+                if outcome != "hit_rate":
+                    lines.append(f'finans_cache_lookups_total{{cache="{name}",outcome="{outcome}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path=METRICS_PATH, cache_stats=None):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text(cache_stats))
+        os.replace(path + ".tmp", path)
+
+
+def hit_rate(outcomes):
+    lookups = sum(outcomes.get(name, 0) for name in ("hit", "stale_hit", "miss", "inflight_join"))
+    return (outcomes.get("hit", 0) + outcomes.get("stale_hit", 0)) / lookups if lookups else 0.0
+
+
+class RerunProfiler:
+    # Tek bir çalıştırmanın profili. pyinstrument kuruluysa örnekleyici kullanılır,
+    # değilse standart cProfile (en pahalı 40 fonksiyon, kümülatif süreye göre).
+    def __init__(self, backend="auto"):
+        if backend == "auto":
+            try:
+                import pyinstrument  # noqa: F401
+                backend = "pyinstrument"
+            except ImportError:
+                backend = "cprofile"
+        self.backend = backend
+        self._profiler = None
+
+    def start(self):
+        if self.backend == "pyinstrument":
+            from pyinstrument import Profiler
+            self._profiler = Profiler()
+            self._profiler.start()
+        else:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    def stop(self):
+        if self.backend == "pyinstrument":
+            self._profiler.stop()
+            return self._profiler.output_text(unicode=True, color=False)
+        self._profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(40)
+        return out.getvalue()
@@ -0,0 +1,217 @@
+import os
+import random
+import threading
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from data_store import INTERVAL_STEPS, PERIOD_OFFSETS, align_timestamp, bar_paths, normalize_ohlcv
+from universe import get_universe
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+# Piyasa verisi sağlayıcı arayüzü. Tüm sağlayıcılar yfinance ile aynı şekilde
+# DataFrame döner: tek sembol için düz OHLCV kolonları, toplu istekte
+# (sembol, alan) MultiIndex kolonları.
+class MarketDataProvider:
+    name = "base"
+
+    def fetch_history(self, ticker, period, interval):
+        raise NotImplementedError
+
+    def fetch_delta(self, ticker, start, interval):
+        raise NotImplementedError
+
+    def fetch_batch(self, tickers, period, timeout=10, interval="1d"):
+        raise NotImplementedError
+
+
+def _yfinance():
+    # yfinance ilk indirmede yüklenir (içe aktarma ~0.2 sn); diskteki veriyle açılan
+    # ilk ekran ve replay sağlayıcı onu hiç yüklemez
+    import yfinance as yf
+    return yf
+
+
+class YFinanceProvider(MarketDataProvider):
+    name = "yfinance"
+
+    def fetch_history(self, ticker, period, interval):
+        return _yfinance().download(ticker, period=period, interval=interval, progress=False)
+
+    def fetch_delta(self, ticker, start, interval):
+        return _yfinance().download(ticker, start=start, interval=interval, progress=False)
+
+    def fetch_batch(self, tickers, period, timeout=10, interval="1d"):
+        return _yfinance().download(" ".join(tickers), period=period, interval=interval, group_by='ticker', progress=False, timeout=timeout)
+
+
+# Sentetik serilerde geriye dönük üretilen süre (yfinance sınırlarına yakın)
+SYNTHETIC_LOOKBACK = {
+    "1m": pd.Timedelta(days=7),
+    "2m": pd.Timedelta(days=60),
+    "5m": pd.Timedelta(days=60),
+    "15m": pd.Timedelta(days=60),
+    "30m": pd.Timedelta(days=60),
+    "60m": pd.Timedelta(days=730),
+    "1h": pd.Timedelta(days=730),
+}
+DEFAULT_SYNTHETIC_LOOKBACK = pd.Timedelta(days=3650)
+
+# BIST seans saatleri (yerel saat)
+BIST_TZ = "Europe/Istanbul"
+BIST_SESSION = (10, 18)
+
+
+def session_mask(index, ticker, interval):
+    # Kripto 7/24; BIST hafta içi seans saatleri; diğerleri hafta içi
+    session = get_universe().instrument(ticker).session
+    if session == "24/7":
+        return np.ones(len(index), dtype=bool)
+    if session == "bist":
+        local = index.tz_convert(BIST_TZ)
+        mask = local.dayofweek < 5
+        if INTERVAL_STEPS.get(interval, pd.Timedelta(days=1)) < pd.Timedelta(days=1):
+            mask &= (local.hour >= BIST_SESSION[0]) & (local.hour < BIST_SESSION[1])
+        return np.asarray(mask)
+    return np.asarray(index.dayofweek < 5)
+
+
+class _SyntheticSeries:
+    # Sabit başlangıçtan itibaren deterministik rastgele yürüyüş; saat ilerledikçe uzar
+    def __init__(self, ticker, interval, origin, seed):
+        self.ticker = ticker
+        self.interval = interval
+        self.step = INTERVAL_STEPS.get(interval, pd.Timedelta(days=1))
+        self.origin = origin
+        key = zlib.crc32(f"{ticker}|{interval}".encode())
+        self.rng = np.random.default_rng([seed, key])
+        self.price = float(self.rng.uniform(5, 500))
+        # Bar başına oynaklık, interval süresine göre ölçeklenir
+        self.vol = float(self.rng.uniform(0.15, 0.8)) * np.sqrt(self.step / pd.Timedelta(days=365))
+        self.frame = pd.DataFrame(columns=OHLCV_COLUMNS, dtype=float,
+                                  index=pd.DatetimeIndex([], tz="UTC", name='Date'))
+        self.last = origin - self.step
+
+    def extend_to(self, end):
+        grid = pd.date_range(self.last + self.step, end, freq=self.step, tz="UTC", name='Date')
+        if len(grid) == 0:
+            return
+        self.last = grid[-1]
+        grid = grid[session_mask(grid, self.ticker, self.interval)]
+        n = len(grid)
+        if n == 0:
+            return
+        steps = self.rng.normal(0, self.vol, n)
+        close = self.price * np.exp(np.cumsum(steps))
+        open_ = np.concatenate([[self.price], close[:-1]])
+        wick = np.abs(self.rng.normal(0, self.vol / 2, (2, n)))
+        block = pd.DataFrame({
+            'Open': open_,
+            'High': np.maximum(open_, close) * (1 + wick[0]),
+            'Low': np.minimum(open_, close) * (1 - wick[1]),
+            'Close': close,
+            'Volume': np.round(self.rng.lognormal(12, 1, n)),
+        }, index=grid)
+        self.price = float(close[-1])
+        self.frame = block if self.frame.empty else pd.concat([self.frame, block])
+
+
+class ReplayProvider(MarketDataProvider):
+    # Ağ bağlantısı olmadan, deterministik veri sunan sağlayıcı.
+    # directory içinde BarStore düzeninde (bars/<ticker>__<interval>.parquet) kayıt varsa
+    # o kayıt oynatılır; yoksa sembol başına sentetik OHLCV üretilir.
+    # latency (sn) her isteğe, latency_per_symbol toplu isteklerde sembol başına eklenir;
+    # failure_rate oranında istek hata fırlatır.
+    name = "replay"
+
+    def __init__(self, directory=None, latency=0.0, latency_per_symbol=0.0,
+                 failure_rate=0.0, seed=0, end=None):
+        self.directory = directory
+        self.latency = latency
+        self.latency_per_symbol = latency_per_symbol
+        self.failure_rate = failure_rate
+        self.seed = seed
+        # end verilirse saat donar (tekrarlanabilir ölçüm); verilmezse gerçek saat ilerler
+        self.end = None if end is None else pd.Timestamp(end, tz="UTC")
+        self._start_clock = pd.Timestamp.now(tz="UTC") if self.end is None else self.end
+        self._series = {}
+        self._lock = threading.Lock()
+        self._failures = random.Random(seed)
+
+    def _clock(self):
+        return self.end if self.end is not None else pd.Timestamp.now(tz="UTC")
+
+    def _simulate_call(self, n_symbols=1):
+        delay = self.latency + self.latency_per_symbol * n_symbols
+        if delay > 0:
+            time.sleep(delay)
+        with self._lock:
+            failed = self._failures.random() < self.failure_rate
+        if failed:
+            raise ConnectionError("replay: enjekte edilmiş hata")
+
+    def _recorded(self, ticker, interval):
+        if not self.directory:
+            return None
+        path = bar_paths(self.directory, ticker, interval)[0]
+        if not os.path.exists(path):
+            return None
+        return normalize_ohlcv(pd.read_parquet(path))
+
+    def bars(self, ticker, interval):
+        key = (ticker, interval)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                recorded = self._recorded(ticker, interval)
+                if recorded is not None:
+                    self._series[key] = recorded
+                    return recorded
+                step = INTERVAL_STEPS.get(interval, pd.Timedelta(days=1))
+                lookback = SYNTHETIC_LOOKBACK.get(interval, DEFAULT_SYNTHETIC_LOOKBACK)
+                origin = (self._start_clock - lookback).floor(step if step < pd.Timedelta(days=1) else "D")
+                series = self._series[key] = _SyntheticSeries(ticker, interval, origin, self.seed)
+            if isinstance(series, pd.DataFrame):
+                return series
+            series.extend_to(self._clock())
+            return series.frame
+
+    def _history(self, ticker, period, interval):
+        df = self.bars(ticker, interval)
+        offset = PERIOD_OFFSETS.get(period)
+        if offset is None or df.empty:
+            return df
+        return df[df.index >= df.index[-1] - offset]
+
+    def fetch_history(self, ticker, period, interval):
+        self._simulate_call()
+        return self._history(ticker, period, interval).copy()
+
+    def fetch_delta(self, ticker, start, interval):
+        self._simulate_call()
+        df = self.bars(ticker, interval)
+        return df[df.index >= align_timestamp(start, df.index)].copy()
+
+    def fetch_batch(self, tickers, period, timeout=10, interval="1d"):
+        self._simulate_call(len(tickers))
+        frames = {ticker: self._history(ticker, period, interval) for ticker in tickers}
+        return pd.concat(frames, axis=1).sort_index()
+
+
+def get_provider(name=None):
+    # FINANS_PROVIDER=replay ile uygulama tamamen yerel veriyle çalışır
+    name = name or os.environ.get("FINANS_PROVIDER", "yfinance")
+    if name == "replay":
+        return ReplayProvider(
+            directory=os.environ.get("FINANS_REPLAY_DIR"),
+            latency=float(os.environ.get("FINANS_REPLAY_LATENCY", 0)),
+            latency_per_symbol=float(os.environ.get("FINANS_REPLAY_LATENCY_PER_SYMBOL", 0)),
+            failure_rate=float(os.environ.get("FINANS_REPLAY_FAILURE_RATE", 0)),
+            seed=int(os.environ.get("FINANS_REPLAY_SEED", 0)),
+            end=os.environ.get("FINANS_REPLAY_END"),
+        )
+    return YFinanceProvider()
@@ -0,0 +1,55 @@
+import pandas as pd
+
+from scanner import symbol_profile
+
+# Türetilmiş zaman dilimleri (4s, 2s, 30dk...) önbellekteki en ince temel barlardan
+# yerelde üretilir; zaman dilimi değiştirmek yeni bir indirme gerektirmez.
+OHLCV_AGG = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+# Borsa seansına göre kova başlangıcı: (saat dilimi, günün başlangıcına göre kayma)
+# BIST 10:00'da açılır; 4 saatlik kovalar 10:00-14:00, 14:00-18:00 olur.
+SESSION_ANCHORS = {
+    "bist": ("Europe/Istanbul", "10h"),
+    "crypto": ("UTC", "0h"),
+    "fx": ("UTC", "0h"),
+}
+
+
+def session_anchor(ticker):
+    return SESSION_ANCHORS[symbol_profile(ticker)]
+
+
+def _resampler(obj, rule, ticker):
+    tz, offset = session_anchor(ticker)
+    original_tz = obj.index.tz
+    if original_tz is not None:
+        obj = obj.tz_convert(tz)
+    return obj.resample(rule, origin="start_day", offset=offset, label="left", closed="left"), original_tz
+
+
+def _restore_tz(obj, original_tz):
+    if original_tz is not None:
+        return obj.tz_convert(original_tz)
+    return obj
+
+
+def resample_ohlcv(df, rule, ticker=""):
+    agg = {col: OHLCV_AGG.get(col, 'last') for col in df.columns}
+    resampler, original_tz = _resampler(df, rule, ticker)
+    out = resampler.agg(agg)
+    # Piyasanın kapalı olduğu boş kovalar atılır
+    out = out.dropna(subset=['Open'])
+    out.index.name = 'Date'
+    return _restore_tz(out, original_tz)
+
+
+def resample_close(close, rule):
+    # Geniş (zaman x sembol) kapanış matrisi; semboller seans tipine göre gruplanır
+    groups = {}
+    for symbol in close.columns:
+        groups.setdefault(session_anchor(symbol), []).append(symbol)
+    parts = []
+    for symbols in groups.values():
+        resampler, original_tz = _resampler(close[symbols], rule, symbols[0])
+        parts.append(_restore_tz(resampler.last(), original_tz))
+    return pd.concat(parts, axis=1, sort=True).reindex(columns=close.columns)
@@ -0,0 +1,285 @@
+import argparse
+import threading
+import time
+from functools import partial
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from monte_carlo import simulate
+from scanner import batch_field
+
+# Çoklu enstrüman risk analizi: farklı takvimli (BIST, 7/24 kripto, FX) sembollerin
+# hizalı getiri matrisi, kayan korelasyon/kovaryans, benchmark'a göre beta,
+# portföy VaR/CVaR ve korelasyonu koruyan portföy Monte Carlo simülasyonu.
+DEFAULT_WINDOW = 60
+# Takvim: sembollerin en az bu oranının fiyatı olan barlar (karışık evrende hafta sonları düşer)
+CALENDAR_COVERAGE = 0.5
+# Matrise girmek için takvim barlarının en az bu oranında getirisi olmalı
+MIN_COVERAGE = 0.8
+# Tatil/eksik barlarda son fiyat en fazla bu kadar bar taşınır (getiri 0 sayılır)
+MAX_STALE_BARS = 5
+# XᵀX bu genişlikte sütun bloklarıyla çarpılır (bellek N x blok ile sınırlı)
+GRAM_BLOCK = 256
+# Artımlı toplamlar bu kadar güncellemede bir baştan hesaplanır (kayan nokta birikimi)
+REBUILD_EVERY = 250
+VAR_LEVEL = 0.95
+
+BENCHMARKS = {
+    "XU100.IS": "BIST 100",
+    "BTC-USD": "Bitcoin",
+    "^GSPC": "S&P 500",
+}
+
+
+def aligned_returns(close, calendar_coverage=CALENDAR_COVERAGE, min_coverage=MIN_COVERAGE, max_stale=MAX_STALE_BARS):
+    # close: (zaman x sembol) kapanışlar, takvimlerin birleşimi üzerinde (eksikler NaN).
+    # Fiyatlar önce tüm barlarda ileri taşınır, sonra ortak takvime örneklenir; böylece
+    # takvim dışı barlardaki hareket (ör. kriptonun hafta sonu) sonraki takvim barının
+    # getirisine eklenir. Geç listelenen/eksik semboller atılır, kalan boşluklar 0 getiri.
+    close = close.astype(float)
+    calendar = close.notna().mean(axis=1) >= calendar_coverage
+    prices = close.ffill(limit=max_stale)[calendar]
+    returns = prices.pct_change(fill_method=None).iloc[1:]
+    keep = returns.notna().mean() >= min_coverage
+    return returns.loc[:, keep].fillna(0.0)
+
+
+def universe_returns(df_batch, symbols):
+    # Toplu indirmeden (fetch_universe) hizalı getiri matrisi
+    return aligned_returns(batch_field(df_batch, 'Close', symbols))
+
+
+def gram(x, block=GRAM_BLOCK):
+    # XᵀX sütun blokları halinde; simetri nedeniyle yalnız üst üçgen blokları çarpılır
+    n = x.shape[1]
+    out = np.empty((n, n))
+    for i in range(0, n, block):
+        left = x[:, i:i + block]
+        for j in range(i, n, block):
+            product = left.T @ x[:, j:j + block]
+            out[i:i + block, j:j + block] = product
+            if j != i:
+                out[j:j + block, i:i + block] = product.T
+    return out
+
+
+class RollingMoments:
+    # Son `window` barın getiri toplamı (Σx) ve çarpım matrisi (XᵀX). Yeni ya da revize
+    # edilen barlar geldiğinde pencereden çıkan ve giren satırlar tek matris çarpımıyla
+    # çıkarılıp eklenir; 500 sembolde tazeleme pencere boyundan bağımsız O(k·N²).
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window
+        self.lock = threading.Lock()
+        self.columns = None
+        self.index = None
+        self._rows = None
+        self._sum = None
+        self._gram = None
+        self._updates = 0
+        self.last_update = None
+
+    def _rebuild(self, values, index):
+        rows = values[-self.window:]
+        self._rows = rows.copy()
+        self.index = index[-self.window:]
+        self._sum = rows.sum(axis=0)
+        self._gram = gram(rows)
+        self._updates = 0
+        self.last_update = "full"
+
+    def update(self, returns):
+        values = returns.to_numpy(dtype=float)
+        index = returns.index
+        if self.index is None or not returns.columns.equals(self.columns) or self._updates >= REBUILD_EVERY:
+            self.columns = returns.columns
+            self._rebuild(values, index)
+            return self
+
+        locs = index.get_indexer(self.index)
+        first = locs[0]
+        if first < 0 or not np.array_equal(locs, np.arange(first, first + len(locs))):
+            self._rebuild(values, index)
+            return self
+
+        # Saklanan pencereden ilk değişen satır (son bar revize edilmiş olabilir)
+        stored = self._rows
+        current = values[first:first + len(stored)]
+        changed = np.flatnonzero(~(current == stored).all(axis=1))
+        kept_end = first + (changed[0] if len(changed) else len(stored))
+        start = max(len(values) - self.window, 0)
+
+        removed = np.concatenate([stored[:max(0, min(start, kept_end) - first)], stored[kept_end - first:]])
+        added = values[max(kept_end, start):]
+        if len(removed) + len(added) >= self.window:
+            self._rebuild(values, index)
+            return self
+        if len(removed) or len(added):
+            # Giren satırlar +1, çıkanlar -1 ağırlıkla tek çarpımda
+            rows = np.concatenate([added, removed])
+            signs = np.concatenate([np.ones(len(added)), -np.ones(len(removed))])
+            self._sum += signs @ rows
+            self._gram += rows.T @ (signs[:, None] * rows)
+            self._rows = values[start:].copy()
+            self.index = index[start:]
+            self._updates += 1
+        self.last_update = "incremental"
+        return self
+
+    def count(self):
+        return 0 if self._rows is None else len(self._rows)
+
+    def _covariance(self):
+        n = self.count()
+        mean = self._sum / n
+        cov = self._gram - n * np.outer(mean, mean)
+        cov /= max(n - 1, 1)
+        return cov
+
+    def covariance(self):
+        return pd.DataFrame(self._covariance(), index=self.columns, columns=self.columns)
+
+    def correlation(self):
+        corr = self._covariance()
+        std = np.sqrt(np.clip(np.diag(corr), 0, None))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr /= std[:, None]
+            corr /= std[None, :]
+        np.clip(corr, -1, 1, out=corr)
+        np.fill_diagonal(corr, 1.0)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+
+def _rolling_sum(values, window):
+    cumulative = np.cumsum(values, axis=0)
+    cumulative = np.concatenate([np.zeros((1,) + values.shape[1:]), cumulative])
+    return cumulative[window:] - cumulative[:-window]
+
+
+def rolling_beta(returns, benchmark, window=DEFAULT_WINDOW):
+    # Her sembolün benchmark'a göre kayan betası (zaman x sembol), kümülatif toplam farklarıyla
+    x = returns.to_numpy(dtype=float)
+    b = benchmark.reindex(returns.index).fillna(0.0).to_numpy(dtype=float)
+    if len(b) < window:
+        return pd.DataFrame(columns=returns.columns, dtype=float)
+    sum_b = _rolling_sum(b, window)
+    sum_bb = _rolling_sum(b * b, window)
+    sum_x = _rolling_sum(x, window)
+    sum_xb = _rolling_sum(x * b[:, None], window)
+    cov = sum_xb - sum_x * (sum_b / window)[:, None]
+    var = sum_bb - sum_b * sum_b / window
+    with np.errstate(invalid='ignore', divide='ignore'):
+        beta = cov / var[:, None]
+    return pd.DataFrame(beta, index=returns.index[window - 1:], columns=returns.columns)
+
+
+def beta(returns, benchmark, window=DEFAULT_WINDOW):
+    # Son pencerenin betası (sembol başına)
+    window = min(window, len(returns))
+    betas = rolling_beta(returns.iloc[-window:], benchmark, window)
+    return betas.iloc[-1] if len(betas) else pd.Series(np.nan, index=returns.columns)
+
+
+def portfolio_returns(returns, weights=None):
+    # Sabit ağırlıklı (her barda yeniden dengelenen) portföyün getirisi; varsayılan eşit ağırlık
+    if weights is None:
+        weights = np.full(returns.shape[1], 1.0 / returns.shape[1])
+    else:
+        weights = pd.Series(weights).reindex(returns.columns).fillna(0.0).to_numpy(dtype=float)
+        weights = weights / weights.sum()
+    return pd.Series(returns.to_numpy(dtype=float) @ weights, index=returns.index, name="Portföy")
+
+
+def value_at_risk(portfolio, level=VAR_LEVEL, horizon=1):
+    # Tarihsel ve parametrik (normal) VaR/CVaR, kayıp yüzdesi olarak (pozitif = kayıp).
+    # horizon > 1 ise örtüşen horizon-barlık bileşik getiriler kullanılır.
+    r = np.asarray(portfolio, dtype=float)
+    r = r[~np.isnan(r)]
+    if horizon > 1:
+        r = np.expm1(_rolling_sum(np.log1p(r), horizon))
+    alpha = 1 - level
+    cutoff = np.quantile(r, alpha)
+    tail = r[r <= cutoff]
+    mu, sigma = r.mean(), r.std(ddof=1)
+    z = NormalDist().inv_cdf(alpha)
+    return {
+        "VaR %": -cutoff * 100,
+        "CVaR %": -tail.mean() * 100,
+        "Parametrik VaR %": -(mu + z * sigma) * 100,
+        "Parametrik CVaR %": -(mu - sigma * NormalDist().pdf(z) / alpha) * 100,
+    }
+
+
+def simulate_portfolio(returns, weights=None, value=1.0, **kwargs):
+    # Korelasyonlu Monte Carlo: portföyün adım getirisi wᵀr olduğundan korelasyon bu
+    # serinin varyansında (wᵀΣw) taşınır; bootstrap'ta ise aynı barın tüm sembol
+    # getirileri birlikte çekilmiş olur. Tek varlık simülasyonu bu seriye uygulanır.
+    return simulate(value, portfolio_returns(returns, weights).to_numpy(), **kwargs)
+
+
+def top_pairs(corr, n=10, largest=True):
+    # Üst üçgendeki en yüksek (ya da en düşük) korelasyonlu sembol çiftleri
+    values = corr.to_numpy()
+    rows, cols = np.triu_indices(len(values), k=1)
+    pair_values = values[rows, cols]
+    order = np.argsort(pair_values)
+    order = order[::-1][:n] if largest else order[:n]
+    return pd.DataFrame({
+        "Sembol 1": corr.index[rows[order]],
+        "Sembol 2": corr.columns[cols[order]],
+        "Korelasyon": pair_values[order],
+    })
+
+
+def main(argv=None):
+    from providers import get_provider
+    from screener import fetch_universe
+    from universe import ASSET_CLASSES, get_universe
+
+    parser = argparse.ArgumentParser(description="Sembol evreni korelasyon ve risk matrisi")
+    parser.add_argument("--universe", default="equity", choices=["all"] + list(ASSET_CLASSES))
+    parser.add_argument("--benchmark", default="XU100.IS")
+    parser.add_argument("--period", default="1y")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW)
+    parser.add_argument("--level", type=float, default=VAR_LEVEL)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    symbols = [s for s in get_universe().select(asset_class=None if args.universe == "all" else args.universe)
+               if s != args.benchmark]
+    provider = get_provider()
+    started = time.perf_counter()
+    df_batch, _ = fetch_universe(symbols + [args.benchmark], partial(provider.fetch_batch, interval="1d"), args.period)
+    if df_batch is None:
+        print("Veri alınamadı.")
+        return 1
+    returns = universe_returns(df_batch, symbols + [args.benchmark])
+    if args.benchmark not in returns:
+        print(f"Benchmark ({args.benchmark}) verisi yetersiz.")
+        return 1
+    benchmark = returns.pop(args.benchmark)
+    print(f"{returns.shape[1]} sembol, {len(returns)} bar ({time.perf_counter() - started:.1f} sn)")
+
+    moments = RollingMoments(args.window)
+    started = time.perf_counter()
+    moments.update(returns.iloc[:-1])
+    full_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    moments.update(returns)
+    corr = moments.correlation()
+    update_ms = (time.perf_counter() - started) * 1000
+    print(f"Korelasyon {corr.shape[0]}x{corr.shape[1]}: baştan {full_ms:.1f} ms, yeni bar {update_ms:.1f} ms")
+
+    with pd.option_context("display.width", 200):
+        print("\nEn yüksek korelasyonlar:")
+        print(top_pairs(corr, args.top).round(3).to_string(index=False))
+        print(f"\nBeta ({args.benchmark}, son {args.window} bar):")
+        print(beta(returns, benchmark, args.window).sort_values(ascending=False).head(args.top).round(2).to_string())
+    risk = value_at_risk(portfolio_returns(returns), args.level)
+    print(f"\nEşit ağırlıklı portföy, %{args.level * 100:g} güven: " + ", ".join(f"{k} {v:.2f}" for k, v in risk.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,255 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from indicators import calculate_rsi
+from universe import get_universe
+
+# Varlık sınıfına göre tarama ayarları: parça büyüklüğü, eşzamanlılık,
+# parça başına zaman aşımı (sn), tekrar sayısı ve bekleme katsayısı (sn)
+SCAN_PROFILES = {
+    "bist": {"chunk_size": 50, "max_workers": 4, "timeout": 20, "retries": 2, "backoff": 1.0},
+    "crypto": {"chunk_size": 20, "max_workers": 2, "timeout": 15, "retries": 2, "backoff": 1.0},
+    "fx": {"chunk_size": 20, "max_workers": 2, "timeout": 15, "retries": 2, "backoff": 1.0},
+}
+
+
+def symbol_profile(symbol):
+    # Evrendeki seans bilgisinden; bilinmeyen semboller sonekten tahmin edilir
+    return get_universe().profile(symbol)
+
+
+def chunk_symbols(symbols, profiles=SCAN_PROFILES):
+    groups = {}
+    for symbol in symbols:
+        groups.setdefault(symbol_profile(symbol), []).append(symbol)
+    chunks = []
+    for name, group in groups.items():
+        size = profiles[name]["chunk_size"]
+        for i in range(0, len(group), size):
+            chunks.append((name, group[i:i + size]))
+    return chunks
+
+
+SCAN_COLUMNS = ["Symbol", "Price", "Change %", "Volume"]
+
+
+def batch_field(df_batch, field, symbols):
+    # Geniş (zaman x sembol) matris; yfinance'in iki kolon düzenini de destekler
+    if isinstance(df_batch.columns, pd.MultiIndex):
+        if field in df_batch.columns.get_level_values(0):
+            wide = df_batch[field]
+        else:
+            wide = df_batch.xs(field, axis=1, level=1)
+        return wide.reindex(columns=symbols).astype(float)
+    # Single ticker or flat structure fallback
+    if len(symbols) == 1 and field in df_batch.columns:
+        return df_batch[[field]].set_axis(symbols, axis=1).astype(float)
+    return pd.DataFrame(np.nan, index=df_batch.index, columns=symbols)
+
+
+def last_valid_rows(values, count=2):
+    # Her kolonun son `count` geçerli satır numarası (yoksa -1), sondan başa doğru
+    rows = np.arange(len(values))[:, None]
+    pos = np.where(~np.isnan(values), rows, -1)
+    cols = np.arange(values.shape[1])
+    out = []
+    for _ in range(count):
+        idx = pos.max(axis=0) if len(values) else np.full(values.shape[1], -1)
+        out.append(idx)
+        found = idx >= 0
+        pos[idx[found], cols[found]] = -1
+    return out
+
+
+def bottom_align(values):
+    # Her kolonun geçerli değerlerini sıra bozulmadan alta yaslar (NaN'lar üste).
+    # Takvimi farklı semboller tek matriste "kendi dropna'sı" ile hesaplanabilir.
+    order = np.argsort(~np.isnan(values), axis=0, kind='stable')
+    return np.take_along_axis(values, order, axis=0)
+
+
+def rsi_metric(fields, window=14):
+    return calculate_rsi(fields, window).iloc[-1]
+
+
+def sma_distance_metric(fields, window=50):
+    # Son kapanışın SMA'ya yüzde uzaklığı
+    sma = fields['Close'].rolling(window=window).mean().iloc[-1]
+    return (fields['Close'].iloc[-1] / sma - 1) * 100
+
+
+def summarize_batch(df_batch, symbols, metrics=None):
+    # Tüm semboller için son kapanış, bir önceki geçerli kapanış, % değişim ve hacim
+    # tek seferde, geniş matris üzerinde hesaplanır.
+    close = batch_field(df_batch, 'Close', symbols)
+    volume = batch_field(df_batch, 'Volume', symbols)
+    values = close.to_numpy()
+    last_idx, prev_idx = last_valid_rows(values, 2)
+    ok = prev_idx >= 0
+    cols = np.flatnonzero(ok)
+    last_close = values[last_idx[ok], cols]
+    prev_close = values[prev_idx[ok], cols]
+
+    results = pd.DataFrame({
+        "Symbol": np.asarray(symbols, dtype=object)[ok],
+        "Price": last_close,
+        "Change %": (last_close - prev_close) / prev_close * 100,
+        "Volume": volume.to_numpy()[last_idx[ok], cols],
+    }, columns=SCAN_COLUMNS)
+
+    if metrics:
+        # Ek metrikler sembol başına dropna edilmiş (alta yaslanmış) seriler üzerinde
+        mask = np.isnan(values)
+        fields = {}
+        for field in ('Open', 'High', 'Low', 'Close', 'Volume'):
+            wide = batch_field(df_batch, field, symbols).to_numpy()
+            wide = np.where(mask, np.nan, wide)
+            fields[field] = pd.DataFrame(bottom_align(wide), columns=symbols)
+        for name, metric in metrics.items():
+            results[name] = np.asarray(metric(fields), dtype=float)[ok]
+    return results
+
+
+def top_n(results, column, n=10, largest=True):
+    # Tam sıralama yerine kısmi seçim
+    if largest:
+        return results.nlargest(n, column)
+    return results.nsmallest(n, column)
+
+
+# Zaman aşımına uğrayıp arka planda hâlâ süren (iptal edilemeyen) istek sınırı, profil başına
+MAX_ABANDONED_FETCHES = 4
+
+
+class _FetchPool:
+    # Profil başına paylaşılan indirme havuzu. Zaman aşımı sağlayıcıdan bağımsız uygulanır
+    # (timeout'u yok sayan sağlayıcılar da tekrar/geri çekilmeye düşer); takılan çağrı
+    # bitene kadar bir iş parçacığını tutar, sayıları MAX_ABANDONED_FETCHES ile sınırlıdır.
+    def __init__(self, name, max_workers, max_abandoned=MAX_ABANDONED_FETCHES):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers + max_abandoned,
+                                           thread_name_prefix=f"scan-fetch-{name}")
+        self.max_abandoned = max_abandoned
+        self.abandoned = 0
+        self.lock = threading.Lock()
+
+    def call(self, fn, timeout):
+        with self.lock:
+            if self.abandoned >= self.max_abandoned:
+                raise RuntimeError(f"takılı istek sınırı dolu ({self.abandoned})")
+        future = self.executor.submit(fn)
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            with self.lock:
+                self.abandoned += 1
+            future.add_done_callback(self._release)
+            raise
+
+    def _release(self, future):
+        with self.lock:
+            self.abandoned -= 1
+
+
+_FETCH_POOLS = {}
+_FETCH_POOLS_LOCK = threading.Lock()
+
+
+def _fetch_pool(name, settings):
+    key = (name, settings["max_workers"])
+    with _FETCH_POOLS_LOCK:
+        if key not in _FETCH_POOLS:
+            _FETCH_POOLS[key] = _FetchPool(name, settings["max_workers"])
+        return _FETCH_POOLS[key]
+
+
+def _fetch_chunk(fetch, profile_name, symbols, period, settings, process):
+    start = time.perf_counter()
+    pool = _fetch_pool(profile_name, settings)
+    error = None
+    attempts = 0
+    rows = None
+    for attempt in range(settings["retries"] + 1):
+        attempts += 1
+        try:
+            df_batch = pool.call(partial(fetch, symbols, period, settings["timeout"]), settings["timeout"])
+            if df_batch is None or df_batch.empty:
+                raise ValueError("boş yanıt")
+            rows = process(df_batch, symbols)
+            error = None
+            break
+        except Exception as e:
+            if isinstance(e, TimeoutError):
+                error = f"zaman aşımı ({settings['timeout']} sn)"
+            else:
+                error = str(e) or type(e).__name__
+            if attempt < settings["retries"]:
+                # Üstel geri çekilme
+                time.sleep(settings["backoff"] * (2 ** attempt))
+    report = {
+        "Profil": profile_name,
+        "Sembol": len(symbols),
+        "Sonuç": 0 if rows is None else len(rows),
+        "Süre (sn)": time.perf_counter() - start,
+        "Deneme": attempts,
+        "Hata": error,
+    }
+    return report, rows
+
+
+def scan(symbols, fetch, period="5d", profiles=SCAN_PROFILES, deadline=None, metrics=None, process=None):
+    # Parçalar tamamlandıkça (rapor, sonuç) döndürür; hatalı/zaman aşımına uğrayan
+    # parçalar diğerlerini bekletmez. deadline (sn) dolduğunda kalan parçalar
+    # zaman aşımı olarak raporlanır ve o ana kadarki sonuçlar korunur.
+    # process verilmezse her parça summarize_batch ile özetlenir.
+    if process is None:
+        process = partial(summarize_batch, metrics=metrics)
+    chunks = chunk_symbols(symbols, profiles)
+    executors = {
+        name: ThreadPoolExecutor(max_workers=settings["max_workers"], thread_name_prefix=f"scan-{name}")
+        for name, settings in profiles.items()
+    }
+    futures = {}
+    try:
+        for name, chunk in chunks:
+            future = executors[name].submit(_fetch_chunk, fetch, name, chunk, period, profiles[name], process)
+            futures[future] = (name, chunk)
+        try:
+            for future in as_completed(futures, timeout=deadline):
+                yield future.result()
+        except TimeoutError:
+            for future, (name, chunk) in futures.items():
+                if not future.done():
+                    future.cancel()
+                    yield {
+                        "Profil": name,
+                        "Sembol": len(chunk),
+                        "Sonuç": 0,
+                        "Süre (sn)": float(deadline),
+                        "Deneme": 0,
+                        "Hata": "zaman aşımı",
+                    }, None
+    finally:
+        for executor in executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def summarize_reports(reports):
+    # Profil başına gecikme ve hata sayıları (parça büyüklüğü/eşzamanlılık ayarı için)
+    if not reports:
+        return pd.DataFrame()
+    df = pd.DataFrame(reports)
+    df["Başarısız"] = df["Hata"].notna()
+    return df.groupby("Profil").agg(
+        Parça=("Sembol", "size"),
+        Sembol=("Sembol", "sum"),
+        Sonuç=("Sonuç", "sum"),
+        Ortalama_sn=("Süre (sn)", "mean"),
+        Maks_sn=("Süre (sn)", "max"),
+        Tekrar=("Deneme", lambda d: int((d - 1).clip(lower=0).sum())),
+        Başarısız=("Başarısız", "sum"),
+    ).reset_index()
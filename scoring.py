@@ -0,0 +1,87 @@
+import numpy as np
+
+# AI Analist kuralları. Her mod bir grup listesidir; her grup bir if/elif zinciri gibi
+# çalışır: ilk tutan koşul puanı ve mesajı belirler, koşulu None olan satır "else" dalıdır.
+# Koşullar hem tek değerlerle hem de dizilerle (sembol x zaman) çalışır.
+_TREND_RULES = [
+    [
+        (lambda v: v['Close'] > v['SMA20'], 1, "✅ **Trend:** Fiyat 20 periyotluk ortalamanın üzerinde. Yön yukarı."),
+        (None, -1, "🔻 **Trend:** Fiyat kısa vade ortalamanın altında. Temkinli ol."),
+    ],
+    [
+        (lambda v: v['RSI'] < 30, 2, "✅ **Dip Avı:** Aşırı satım bölgesindeyiz. Dönüş mumları ara."),
+        (lambda v: v['RSI'] > 70, -2, "🔻 **Kar Realizasyonu:** Fiyat şişmiş, düzeltme riski yüksek."),
+    ],
+]
+
+RULES = {
+    "SCALPER": [
+        [
+            (lambda v: v['RSI'] < 30, 3, "⚡ **SCALP FIRSATI:** RSI 30 altında! Anlık tepki alımı beklenebilir."),
+            (lambda v: v['RSI'] > 70, -3, "⚡ **DİKKAT:** RSI 70 üzerinde. Hızlı bir satış gelebilir."),
+            (None, 0, "⚪ **RSI:** {RSI:.1f} ile nötr. İşlem kovalamak için erken."),
+        ],
+        [
+            (lambda v: v['MACD'] > v['Signal'], 1, "✅ **Momentum:** MACD pozitif, kısa vadeli alımlar destekleniyor."),
+            (None, -1, "🔻 **Momentum:** MACD negatif, kısa vadeli baskı var."),
+        ],
+    ],
+    "TRADER": _TREND_RULES,
+    "SWING": _TREND_RULES,
+    "YATIRIMCI": [
+        [
+            (lambda v: v['SMA20'] > v['SMA50'], 2, "✅ **Altın Vuruş:** Golden Cross aktif (Kısa vade ortalama, uzun vadeyi yukarı kesti)."),
+            (lambda v: v['SMA20'] < v['SMA50'], -2, "🔻 **Death Cross:** Düşüş trendi baskın (Death Cross). Acele etme."),
+        ],
+        [
+            (lambda v: v['RSI'] < 40, 1, "✅ **Toplama Bölgesi:** RSI düşük seviyelerde, kademeli alım düşünülebilir."),
+            (lambda v: v['RSI'] > 80, -1, "🔻 **Aşırı Prim:** Çok hızlı yükselmiş, uzun vade için pahalı olabilir."),
+        ],
+    ],
+}
+
+# (alt sınır, metin, renk); ilk sağlanan eşik geçerli, hiçbiri değilse NÖTR
+DECISIONS = [
+    (lambda s: s >= 3, "GÜÇLÜ AL 🚀", "green"),
+    (lambda s: s >= 1, "AL 🟢", "lightgreen"),
+    (lambda s: s <= -3, "GÜÇLÜ SAT 🛑", "red"),
+    (lambda s: s <= -1, "SAT 🔴", "orange"),
+]
+NEUTRAL_DECISION = ("NÖTR / BEKLE ⚪", "gray")
+
+
+def score(mode, values):
+    # Vektörel puan: values içindeki diziler aynı şekle sahip olmalı
+    total = 0
+    for group in RULES[mode]:
+        conditions = [np.asarray(cond(values), dtype=bool) for cond, _, _ in group if cond is not None]
+        points = [p for cond, p, _ in group if cond is not None]
+        default = next((p for cond, p, _ in group if cond is None), 0)
+        total = total + np.select(conditions, points, default)
+    return total
+
+
+def evaluate(mode, values):
+    # Tek bar için puan ve arayüzde gösterilecek sinyal mesajları
+    signals = []
+    total = 0
+    for group in RULES[mode]:
+        for cond, points, message in group:
+            if cond is None or cond(values):
+                signals.append(message.format(**values))
+                total += points
+                break
+    return total, signals
+
+
+def decision(total):
+    for cond, text, color in DECISIONS:
+        if cond(total):
+            return text, color
+    return NEUTRAL_DECISION
+
+
+def decisions(scores):
+    scores = np.asarray(scores)
+    return np.select([cond(scores) for cond, _, _ in DECISIONS],
+                     [text for _, text, _ in DECISIONS], NEUTRAL_DECISION[0])
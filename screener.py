@@ -0,0 +1,95 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from data_store import COMPACT_BARS, compact_ohlcv
+from indicators import calculate_macd, calculate_rsi
+from resample import resample_close
+from scanner import batch_field, bottom_align, scan
+from scoring import decisions, score
+
+# Bu sayının üzerindeki evrenlerde indikatörler süreç havuzunda bloklar halinde hesaplanır
+PROCESS_POOL_MIN_SYMBOLS = 1000
+BLOCK_SIZE = 250
+
+SCREEN_COLUMNS = ["Symbol", "Price", "RSI", "MACD", "Signal", "SMA20", "SMA50", "Skor", "Karar"]
+
+
+def _screen_block(close, symbols, mode):
+    # close: alta yaslanmış (zaman x sembol) kapanış matrisi
+    fields = {'Close': pd.DataFrame(close, columns=symbols)}
+    macd, signal_line = calculate_macd(fields)
+    values = {
+        'Close': fields['Close'].iloc[-1].to_numpy(),
+        'RSI': calculate_rsi(fields).iloc[-1].to_numpy(),
+        'MACD': macd.iloc[-1].to_numpy(),
+        'Signal': signal_line.iloc[-1].to_numpy(),
+        'SMA20': fields['Close'].rolling(window=20).mean().iloc[-1].to_numpy(),
+        'SMA50': fields['Close'].rolling(window=50).mean().iloc[-1].to_numpy(),
+    }
+    scores = score(mode, values)
+    return pd.DataFrame({
+        "Symbol": symbols,
+        "Price": values['Close'],
+        "RSI": values['RSI'],
+        "MACD": values['MACD'],
+        "Signal": values['Signal'],
+        "SMA20": values['SMA20'],
+        "SMA50": values['SMA50'],
+        "Skor": scores,
+        "Karar": decisions(scores),
+    }, columns=SCREEN_COLUMNS)
+
+
+def screen_frame(df_batch, symbols, mode, workers=None, resample=None):
+    # Her sembolün geçerli kapanışları alta yaslanır; böylece farklı takvimli semboller
+    # tek matriste, tek tek dropna edilmiş gibi hesaplanır.
+    close = batch_field(df_batch, 'Close', symbols)
+    if resample:
+        close = resample_close(close, resample)
+    close = bottom_align(close.to_numpy())
+    has_data = ~np.isnan(close[-1]) if len(close) else np.zeros(len(symbols), dtype=bool)
+    symbols = list(np.asarray(symbols, dtype=object)[has_data])
+    close = close[:, has_data]
+    if not symbols:
+        return pd.DataFrame(columns=SCREEN_COLUMNS)
+
+    if len(symbols) < PROCESS_POOL_MIN_SYMBOLS or workers == 1:
+        return _screen_block(close, symbols, mode)
+
+    blocks = range(0, len(symbols), BLOCK_SIZE)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = pool.map(
+            _screen_block,
+            [close[:, i:i + BLOCK_SIZE] for i in blocks],
+            [symbols[i:i + BLOCK_SIZE] for i in blocks],
+            [mode] * len(blocks),
+        )
+        return pd.concat(list(parts), ignore_index=True)
+
+
+def _keep_frame(df_batch, symbols):
+    # Tüm evren puanlanana kadar parçalar bellekte bekler; kompakt tutulur
+    return compact_ohlcv(df_batch) if COMPACT_BARS else df_batch
+
+
+def fetch_universe(symbols, fetch, period, deadline=None):
+    # Ortak (parçalı) indirme; tüm parçalar tek geniş tabloda birleştirilir
+    frames = []
+    reports = []
+    for report, frame in scan(symbols, fetch, period=period, deadline=deadline, process=_keep_frame):
+        reports.append(report)
+        if frame is not None:
+            frames.append(frame)
+    if not frames:
+        return None, reports
+    return pd.concat(frames, axis=1, sort=True), reports
+
+
+def screen_universe(symbols, fetch, period, mode, deadline=None, workers=None, resample=None):
+    # Ortak indirme, ardından tüm evren için tek seferde puanlama
+    df_batch, reports = fetch_universe(symbols, fetch, period, deadline)
+    if df_batch is None:
+        return pd.DataFrame(columns=SCREEN_COLUMNS), reports
+    return screen_frame(df_batch, symbols, mode, workers, resample), reports
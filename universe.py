@@ -0,0 +1,148 @@
+import csv
+import os
+import re
+from bisect import bisect_left
+from collections import namedtuple
+from functools import lru_cache
+
+# Sembol evreni: borsa, varlık sınıfı, para birimi ve seans bilgisi yerel bir veri
+# dosyasından süreç başına bir kez yüklenir (FINANS_UNIVERSE_PATH ile değiştirilebilir).
+UNIVERSE_PATH = os.environ.get(
+    "FINANS_UNIVERSE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "universe.csv"),
+)
+
+Instrument = namedtuple("Instrument", ["symbol", "exchange", "asset_class", "currency", "session"])
+
+ASSET_CLASSES = {
+    "equity": "Hisse Senedi",
+    "crypto": "Kripto",
+    "fx": "Döviz & Emtia",
+    "futures": "Vadeli",
+}
+
+# Seans -> tarama profili (scanner.SCAN_PROFILES, resample.SESSION_ANCHORS)
+SESSION_PROFILES = {
+    "bist": "bist",
+    "24/7": "crypto",
+    "fx": "fx",
+    "cme": "fx",
+}
+
+# yfinance sembol sözdizimi (ör. THYAO.IS, BTC-USD, USDTRY=X, GC=F, ^XU100)
+SYMBOL_PATTERN = re.compile(r"^\^?[A-Z0-9][A-Z0-9.\-]{0,14}(=[XF])?$")
+
+
+def infer_instrument(symbol):
+    # Evrende olmayan (manuel girilen) semboller için sonekten tahmin
+    if symbol.endswith(".IS"):
+        return Instrument(symbol, "BIST", "equity", "TRY", "bist")
+    if symbol.endswith("-USD"):
+        return Instrument(symbol, "CRYPTO", "crypto", "USD", "24/7")
+    if symbol.endswith("=F"):
+        return Instrument(symbol, "", "futures", "USD", "cme")
+    if symbol.endswith("=X"):
+        return Instrument(symbol, "FX", "fx", symbol[3:6] or "USD", "fx")
+    return Instrument(symbol, "", "equity", "USD", "fx")
+
+
+def normalize_symbol(text):
+    return (text or "").strip().upper()
+
+
+class Universe:
+    def __init__(self, instruments):
+        self._by_symbol = {inst.symbol: inst for inst in instruments}
+        # Sıralı sembol dizisi: selectbox listesi, O(1) konum ve ikili aramayla önek araması
+        self.symbols = tuple(sorted(self._by_symbol))
+        self._positions = {symbol: i for i, symbol in enumerate(self.symbols)}
+        # Soneksiz kök (THYAO) ile de aranabilsin diye ikinci sıralı anahtar dizisi
+        roots = sorted((_root(symbol), symbol) for symbol in self.symbols)
+        self._root_keys = [root for root, _ in roots]
+        self._root_symbols = [symbol for _, symbol in roots]
+        self._selections = {}
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self._by_symbol
+
+    def get(self, symbol):
+        return self._by_symbol.get(symbol)
+
+    def index(self, symbol, default=0):
+        return self._positions.get(symbol, default)
+
+    def instrument(self, symbol):
+        return self._by_symbol.get(symbol) or infer_instrument(symbol)
+
+    def profile(self, symbol):
+        return SESSION_PROFILES[self.instrument(symbol).session]
+
+    def search(self, prefix, limit=10):
+        # Sembol ya da kökü bu önekle başlayanlar (yazarken öneri için)
+        prefix = normalize_symbol(prefix)
+        if not prefix:
+            return []
+        found = _prefix_range(self.symbols, self.symbols, prefix, limit)
+        for symbol in _prefix_range(self._root_keys, self._root_symbols, prefix, limit):
+            if len(found) >= limit:
+                break
+            if symbol not in found:
+                found.append(symbol)
+        return found
+
+    def select(self, asset_class=None, exchange=None, profile=None):
+        # Alt evren (ör. sadece BIST hisseleri ya da kripto); sonuç bir kez üretilip saklanır
+        key = (asset_class, exchange, profile)
+        selection = self._selections.get(key)
+        if selection is None:
+            selection = tuple(
+                symbol for symbol in self.symbols
+                if (asset_class is None or self._by_symbol[symbol].asset_class == asset_class)
+                and (exchange is None or self._by_symbol[symbol].exchange == exchange)
+                and (profile is None or self.profile(symbol) == profile)
+            )
+            self._selections[key] = selection
+        return selection
+
+    def resolve(self, text):
+        # Manuel girişi doğrular: (Instrument, hata mesajı)
+        symbol = normalize_symbol(text)
+        if not symbol:
+            return None, "Sembol boş olamaz."
+        if symbol in self._by_symbol:
+            return self._by_symbol[symbol], None
+        if not SYMBOL_PATTERN.match(symbol):
+            return None, f"'{symbol}' geçerli bir sembol değil."
+        return infer_instrument(symbol), None
+
+
+def _root(symbol):
+    return re.split(r"[.=\-]", symbol.lstrip("^"), maxsplit=1)[0]
+
+
+def _prefix_range(keys, values, prefix, limit):
+    start = bisect_left(keys, prefix)
+    out = []
+    for i in range(start, min(start + limit, len(keys))):
+        if not keys[i].startswith(prefix):
+            break
+        out.append(values[i])
+    return out
+
+
+def load_universe(path=UNIVERSE_PATH):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        instruments = [
+            Instrument(normalize_symbol(row["symbol"]), row["exchange"], row["asset_class"], row["currency"], row["session"])
+            for row in csv.DictReader(f)
+            if row.get("symbol")
+        ]
+    return Universe(instruments)
+
+
+@lru_cache(maxsize=None)
+def get_universe():
+    return load_universe()
@@ -0,0 +1,202 @@
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from data_store import CACHE_DIR, REVISION_ATTR, BarStore, enable_copy_on_write, safe_name
+from indicators import IndicatorEngine
+from market_config import INTERVALS, WORKER_EVERY, find_timeframe, timeframe_code
+from providers import get_provider
+from resample import resample_ohlcv
+from scoring import decision, evaluate
+from universe import ASSET_CLASSES, get_universe
+
+# Arka plan tarama/alarm servisi. Streamlit'ten bağımsız çalışır:
+#   python worker.py --timeframe 15m --universe crypto --every 60
+# İzlenen evrenin barlarını BarStore'da günceller, indikatörleri artımlı hesaplar,
+# AI Analist kurallarını uygular ve sonuçları diskte yayınlar. Streamlit oturumları
+# bu anlık görüntüyü okur; izleyici sayısı arttıkça sunucu maliyeti sabit kalır.
+logger = logging.getLogger("finans.worker")
+
+SIGNALS_DIR = os.path.join(CACHE_DIR, "signals")
+ALERTS_PATH = os.path.join(CACHE_DIR, "alerts.jsonl")
+
+SIGNAL_COLUMNS = ["Symbol", "Bar", "Price", "RSI", "MACD", "Signal", "SMA20", "SMA50", "Skor", "Karar"]
+
+
+def snapshot_path(code, root=SIGNALS_DIR):
+    return os.path.join(root, f"{safe_name(code)}.parquet")
+
+
+def publish_snapshot(results, code, root=SIGNALS_DIR):
+    path = snapshot_path(code, root)
+    os.makedirs(root, exist_ok=True)
+    results.to_parquet(path + ".tmp")
+    os.replace(path + ".tmp", path)
+
+
+def load_snapshot(code, max_age=None, root=SIGNALS_DIR):
+    # (sonuçlar, yaş sn) döner; yoksa veya max_age'den eskiyse (None, None)
+    path = snapshot_path(code, root)
+    try:
+        age = time.time() - os.path.getmtime(path)
+        if max_age is not None and age > max_age:
+            return None, None
+        return pd.read_parquet(path), age
+    except (OSError, ValueError):
+        return None, None
+
+
+def read_alerts(limit=20, path=ALERTS_PATH):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.readlines()[-limit:]
+    except OSError:
+        return []
+    return [json.loads(line) for line in reversed(lines) if line.strip()]
+
+
+# Alarm kuralları: (önceki satır veya None, yeni satır) -> mesaj veya None.
+# Sadece eşik geçişlerinde tetiklenir, her döngüde tekrar etmez.
+def _crossed(prev, row, column, test):
+    now = test(row[column])
+    before = prev is not None and test(prev[column])
+    return now and not before
+
+
+ALERT_RULES = [
+    ("RSI<30", lambda prev, row: _crossed(prev, row, "RSI", lambda v: v < 30)
+        and f"{row['Symbol']} RSI {row['RSI']:.1f} ile 30 altına indi"),
+    ("RSI>70", lambda prev, row: _crossed(prev, row, "RSI", lambda v: v > 70)
+        and f"{row['Symbol']} RSI {row['RSI']:.1f} ile 70 üzerine çıktı"),
+    ("SKOR>=3", lambda prev, row: _crossed(prev, row, "Skor", lambda v: v >= 3)
+        and f"{row['Symbol']} skoru {row['Skor']} oldu: {row['Karar']}"),
+    ("SKOR<=-3", lambda prev, row: _crossed(prev, row, "Skor", lambda v: v <= -3)
+        and f"{row['Symbol']} skoru {row['Skor']} oldu: {row['Karar']}"),
+]
+
+
+class JsonlAlertSink:
+    def __init__(self, path=ALERTS_PATH):
+        self.path = path
+
+    def send(self, alert):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(alert, ensure_ascii=False) + "\n")
+
+
+class LogAlertSink:
+    def send(self, alert):
+        logger.warning("ALARM [%s] %s", alert["rule"], alert["message"])
+
+
+class SignalWorker:
+    def __init__(self, symbols, params, provider=None, store=None, sinks=None, max_workers=8):
+        self.symbols = list(symbols)
+        self.params = params
+        self.code = timeframe_code(params)
+        self.provider = provider or get_provider()
+        self.store = store or BarStore()
+        self.sinks = sinks if sinks is not None else [JsonlAlertSink(), LogAlertSink()]
+        self.max_workers = max_workers
+        self.engines = {}
+        previous, _ = load_snapshot(self.code)
+        self.previous = {} if previous is None else {row["Symbol"]: row for row in previous.to_dict("records")}
+
+    def refresh_symbol(self, symbol):
+        params = self.params
+        df = self.store.get(symbol, params["period"], params["interval"], self.provider, params.get("fetch_period"))
+        if df is None or df.empty:
+            return None
+        revision = df.attrs.get(REVISION_ATTR)
+        if "resample" in params:
+            df = resample_ohlcv(df, params["resample"], symbol)
+        engine = self.engines.setdefault(symbol, IndicatorEngine())
+        df = engine.update(df, revision)
+        last_bar = df.iloc[-1]
+        values = {name: float(last_bar[name]) for name in ('RSI', 'MACD', 'Signal', 'SMA20', 'SMA50', 'Close')}
+        score, _ = evaluate(params["mode"], values)
+        return {
+            "Symbol": symbol,
+            "Bar": df.index[-1].isoformat(),
+            "Price": values['Close'],
+            "RSI": values['RSI'],
+            "MACD": values['MACD'],
+            "Signal": values['Signal'],
+            "SMA20": values['SMA20'],
+            "SMA50": values['SMA50'],
+            "Skor": int(score),
+            "Karar": decision(score)[0],
+        }
+
+    def _safe_refresh(self, symbol):
+        try:
+            return self.refresh_symbol(symbol)
+        except Exception:
+            logger.exception("%s güncellenemedi", symbol)
+            return None
+
+    def run_once(self):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            rows = [row for row in pool.map(self._safe_refresh, self.symbols) if row is not None]
+        results = pd.DataFrame(rows, columns=SIGNAL_COLUMNS)
+        publish_snapshot(results, self.code)
+        self._emit_alerts(rows)
+        logger.info("%s: %d/%d sembol güncellendi (%.1f sn)", self.code, len(rows), len(self.symbols),
+                    time.perf_counter() - start)
+        return results
+
+    def _emit_alerts(self, rows):
+        for row in rows:
+            prev = self.previous.get(row["Symbol"])
+            for rule, check in ALERT_RULES:
+                message = check(prev, row)
+                if message:
+                    alert = {"time": time.time(), "timeframe": self.code, "rule": rule,
+                             "symbol": row["Symbol"], "bar": row["Bar"], "message": message}
+                    for sink in self.sinks:
+                        sink.send(alert)
+            self.previous[row["Symbol"]] = row
+
+    def run_forever(self, every):
+        while True:
+            started = time.monotonic()
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Döngü başarısız")
+            time.sleep(max(0.0, every - (time.monotonic() - started)))
+
+
+def select_universe(name):
+    return get_universe().select(asset_class=None if name == "all" else name)
+
+
+def main(argv=None):
+    codes = sorted({timeframe_code(p) for p in INTERVALS.values()})
+    parser = argparse.ArgumentParser(description="Finans arka plan tarama ve alarm servisi")
+    parser.add_argument("--timeframe", default="1d", help=f"Zaman dilimi kodu: {', '.join(codes)}")
+    parser.add_argument("--universe", default="all", choices=["all"] + list(ASSET_CLASSES))
+    parser.add_argument("--every", type=float, default=WORKER_EVERY, help="Döngü aralığı (sn)")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--once", action="store_true", help="Tek döngü çalıştır ve çık")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    enable_copy_on_write()
+    _, params = find_timeframe(args.timeframe)
+    worker = SignalWorker(select_universe(args.universe), params, max_workers=args.workers)
+    if args.once:
+        worker.run_once()
+    else:
+        worker.run_forever(args.every)
+
+
+if __name__ == "__main__":
+    main()